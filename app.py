@@ -14,11 +14,16 @@ from typing import List, Dict, Any
 import pandas as pd
 import streamlit as st
 
-from src.recommendation.recommender import (
-    load_country_features,
-    load_model_and_scaler,
-    recommend_destinations,
+from src.recommendation.recommender import load_country_features
+from src.recommendation.counterfactual import (
+    counterfactual_edits,
+    smallest_edit_to_top_k,
 )
+from src.recommendation.fast_path import FastRecommender, recommendations_to_frame
+from src.recommendation.feedback import FeedbackLog, record_feedback
+from src.recommendation.online_update import ModelStore, OnlineUpdater, proxy_pairs
+from src.recommendation.robustness import rank_stability
+from src.utils.config_utils import ScoringConfigWatcher, ScoringPlan
 
 
 def get_project_paths() -> Dict[str, Path]:
@@ -29,6 +34,8 @@ def get_project_paths() -> Dict[str, Path]:
     intermediate_dir = notebooks_dir / "intermediate"
     model_dir = processed_dir / "models"
     external_dir = project_root / "data" / "external"
+    config_dir = project_root / "config"
+    feedback_log = project_root / "data" / "feedback" / "events.jsonl"
 
     return {
         "project_root": project_root,
@@ -37,9 +44,85 @@ def get_project_paths() -> Dict[str, Path]:
         "intermediate_dir": intermediate_dir,
         "model_dir": model_dir,
         "external_dir": external_dir,
+        "config_dir": config_dir,
+        "feedback_log": feedback_log,
     }
 
 
+@st.cache_resource
+def get_scoring_watcher(config_path: str) -> ScoringConfigWatcher:
+    """
+    One watcher per app process, so edits to the scoring config are picked
+    up by the running app without a restart.
+    """
+    return ScoringConfigWatcher(config_path).start()
+
+
+@st.cache_resource
+def get_model_store(model_dir: str) -> ModelStore:
+    """
+    One served NN per app process. Online updates are swapped in here, so
+    every session sees the latest promoted model.
+    """
+    return ModelStore(model_dir)
+
+
+@st.cache_resource(max_entries=4)
+def get_fast_recommender(
+    catalog_path: str,
+    catalog_mtime_ns: int,
+    model_version: str,
+    user_feature_cols: tuple,
+    country_feature_cols: tuple,
+    _country_df: pd.DataFrame,
+    _scaler,
+    _nn_model,
+) -> FastRecommender:
+    """
+    Compiled catalog shared by all sessions. Rebuilt only when the catalog
+    file changes or a new NN version is promoted.
+    """
+    return FastRecommender(
+        _country_df, list(user_feature_cols), list(country_feature_cols), _scaler, _nn_model
+    )
+
+
+@st.cache_resource
+def get_feedback_log(log_path: str) -> FeedbackLog:
+    return FeedbackLog(log_path)
+
+
+@st.cache_resource
+def get_online_updater(
+    model_dir: str,
+    log_path: str,
+    _user_df: pd.DataFrame,
+    _country_df: pd.DataFrame,
+    user_feature_cols: tuple,
+    country_feature_cols: tuple,
+    _scoring_plan: ScoringPlan,
+) -> OnlineUpdater:
+    """
+    Background updater that trains on new feedback in a worker process
+    and promotes validated models into the shared ModelStore. Its
+    proxy-label guard and rehearsal pairs use the scoring plan active
+    when the app started.
+    """
+    store = get_model_store(model_dir)
+    proxy_guard, rehearsal = proxy_pairs(
+        _user_df, _country_df, store.scaler, scoring_plan=_scoring_plan
+    )
+    return OnlineUpdater(
+        log=get_feedback_log(log_path),
+        store=store,
+        country_df=_country_df,
+        user_feature_cols=list(user_feature_cols),
+        country_feature_cols=list(country_feature_cols),
+        proxy_guard=proxy_guard,
+        rehearsal=rehearsal,
+    ).start()
+
+
 def infer_user_feature_cols(user_df: pd.DataFrame) -> List[str]:
     """
     Infer the feature columns that the model expects for users.
@@ -179,14 +262,41 @@ def main():
         user_source = user_file_basic.name
 
     # Load country features and model
-    country_df = load_country_features(external_dir / "country_features.csv")
-    scaler, nn_model = load_model_and_scaler(model_dir)
+    country_file = external_dir / "country_features.csv"
+    country_df = load_country_features(country_file)
+    scoring_watcher = get_scoring_watcher(str(paths["config_dir"] / "scoring_weights.json"))
 
     user_feature_cols = infer_user_feature_cols(user_df)
     country_feature_cols = infer_country_feature_cols(country_df)
 
+    model_store = get_model_store(str(model_dir))
+    feedback_log = get_feedback_log(str(paths["feedback_log"]))
+    get_online_updater(
+        str(model_dir),
+        str(paths["feedback_log"]),
+        user_df,
+        country_df,
+        tuple(user_feature_cols),
+        tuple(country_feature_cols),
+        scoring_watcher.plan,
+    )
+    # Same model for the whole run, even if an update is promoted meanwhile
+    scaler = model_store.scaler
+    nn_model, model_version = model_store.current
+    fast = get_fast_recommender(
+        str(country_file),
+        country_file.stat().st_mtime_ns,
+        model_version,
+        tuple(user_feature_cols),
+        tuple(country_feature_cols),
+        country_df,
+        scaler,
+        nn_model,
+    )
+
     st.sidebar.header("Configuration")
     st.sidebar.write(f"Model trained on: `{user_source}`")
+    st.sidebar.write(f"NN version: `{model_version}`")
 
     top_k = st.sidebar.slider(
         "Top K recommendations",
@@ -203,6 +313,11 @@ def main():
         step=0.05,
         help="final_score = α * baseline + (1 - α) * NN",
     )
+    show_stability = st.sidebar.checkbox(
+        "Show rank stability",
+        value=False,
+        help="Re-rank 1000 perturbed versions of the (uncertain) country indicators",
+    )
 
     st.subheader("Enter your profile")
 
@@ -269,30 +384,25 @@ def main():
             index=0,
         )
 
-    if st.button("Generate recommendations"):
-        user_features = build_user_from_form(
-            age_group=age_group,
-            monthly_budget=monthly_budget,
-            remote_choice=remote_choice,
-            region_prefs=region_prefs,
-            wants_to_relocate=wants_to_relocate,
-            speaks_english=speaks_english,
-            cultural_pref=cultural_pref,
-        )
+    user_features = build_user_from_form(
+        age_group=age_group,
+        monthly_budget=monthly_budget,
+        remote_choice=remote_choice,
+        region_prefs=region_prefs,
+        wants_to_relocate=wants_to_relocate,
+        speaks_english=speaks_english,
+        cultural_pref=cultural_pref,
+    )
 
+    if st.button("Generate recommendations"):
         st.markdown("### Encoded user features (for transparency)")
         st.json(user_features)
 
+        scoring_plan = scoring_watcher.plan
+
         with st.spinner("Computing recommendations..."):
-            recs = recommend_destinations(
-                user_features=user_features,
-                country_df=country_df,
-                user_feature_cols=user_feature_cols,
-                country_feature_cols=country_feature_cols,
-                scaler=scaler,
-                nn_model=nn_model,
-                top_k=top_k,
-                alpha=alpha,
+            recs = recommendations_to_frame(
+                fast.recommend(user_features, top_k=top_k, alpha=alpha, scoring_plan=scoring_plan)
             )
 
         st.subheader("Top recommendations")
@@ -310,10 +420,99 @@ def main():
             use_container_width=True,
         )
 
+        if show_stability:
+            with st.spinner("Sampling uncertain country indicators..."):
+                stability = rank_stability(
+                    fast,
+                    user_features,
+                    n_samples=1000,
+                    top_k=top_k,
+                    alpha=alpha,
+                    scoring_plan=scoring_plan,
+                )
+
+            st.subheader("Rank stability")
+            st.write(
+                f"How often each destination stays in the top {top_k} when the country "
+                "indicators are perturbed within their estimated uncertainty."
+            )
+            st.dataframe(stability, use_container_width=True)
+
+        st.caption(f"Baseline scoring weights: {scoring_plan.version}")
         st.caption(
             "These suggestions are experimental and meant to support, not replace, careful human judgment."
         )
 
+        # Kept for the feedback form, which reruns the script without the button
+        st.session_state["last_recommendations"] = {
+            "user_features": user_features,
+            "recs": recs,
+            "model_version": model_version,
+        }
+
+    last = st.session_state.get("last_recommendations")
+    if last is not None:
+        st.subheader("Was this helpful?")
+        recs = last["recs"]
+        chosen = st.selectbox("Destination", recs["country_name"].tolist(), key="feedback_country")
+        rec = recs[recs["country_name"] == chosen].iloc[0]
+
+        fb_col1, fb_col2 = st.columns(2)
+        event = None
+        if fb_col1.button("👍 I would consider this"):
+            event = "accept"
+        if fb_col2.button("👎 Not for me"):
+            event = "reject"
+        if event is not None:
+            record_feedback(
+                feedback_log,
+                last["user_features"],
+                rec,
+                event,
+                model_version=last["model_version"],
+                user_feature_cols=user_feature_cols,
+            )
+            st.success("Thanks, your feedback was recorded.")
+
+    # Live panel: re-evaluated on every form change, no button needed
+    st.subheader("What would change my ranking?")
+    target_name = st.selectbox(
+        "Destination of interest",
+        country_df["country_name"].tolist(),
+    )
+    edits = counterfactual_edits(
+        fast,
+        user_features,
+        target_name,
+        top_k=top_k,
+        alpha=alpha,
+        scoring_plan=scoring_watcher.plan,
+    )
+    current_rank = int(edits.loc[edits["n_changes"] == 0, "target_rank"].iloc[0])
+    best = smallest_edit_to_top_k(edits)
+
+    if best is None:
+        closest = edits.sort_values("target_rank", kind="stable").iloc[0]
+        st.write(
+            f"{target_name} is ranked {current_rank}. None of the tried edits brings it "
+            f"into the top {top_k}; the closest is **{closest['edit']}** "
+            f"(rank {int(closest['target_rank'])})."
+        )
+    elif best["n_changes"] == 0:
+        st.write(f"{target_name} is already in your top {top_k} (rank {current_rank}).")
+    else:
+        st.write(
+            f"{target_name} is ranked {current_rank}. Smallest change that brings it into "
+            f"the top {top_k}: **{best['edit']}** (rank {int(best['target_rank'])})."
+        )
+
+    st.dataframe(
+        edits[edits["rank_change"] > 0]
+        .sort_values(["target_rank", "n_changes"], kind="stable")
+        .head(10)[["edit", "target_rank", "rank_change", "target_final_score"]],
+        use_container_width=True,
+    )
+
 
 if __name__ == "__main__":
     main()
@@ -14,4 +14,16 @@ COUNTRY_FEATURES_CSV = DATA_DIR / "external" / "country_features.csv"
 # Models path
 MODELS_DIR = PROJECT_ROOT / "models"
 
-RANDOM_SEED = 42
\ No newline at end of file
+RANDOM_SEED = 42
+
+# Scoring weights for the baseline heuristic
+SCORING_CONFIG = PROJECT_ROOT / "config" / "scoring_weights.json"
+
+# Pipeline outputs (see src/pipeline.py)
+CLUSTERED_DATA = DATA_DIR / "processed" / "final_model_dataset_with_clusters.csv"
+REPORTS_DIR = PROJECT_ROOT / "reports"
+PIPELINE_CACHE_DIR = PROJECT_ROOT / ".pipeline_cache"
+
+# User feedback events consumed by the online NN updater
+# (see src/recommendation/online_update.py)
+FEEDBACK_LOG = DATA_DIR / "feedback" / "events.jsonl"
@@ -0,0 +1,107 @@
+"""
+Cleaning of the raw survey responses (notebook 01).
+
+This module provides:
+- The mapping from survey questions to short column names
+- Normalisation of budget bands, passport status and remote work answers
+- clean_responses, which turns the raw export into cleaned_responses.csv
+"""
+
+from __future__ import annotations
+
+import numpy as np
+import pandas as pd
+
+
+RENAME_MAP = {
+    "Age Group ": "age_group",
+    "Gender ": "gender",
+    "Current Location ": "current_country",
+    "Reason for Current Country of Residence": "reason_current_country",
+    "Marital Status ": "marital_status",
+    "Number of Dependents\\Family Members moving with you ": "dependents",
+    "Highest Level of Education  ": "education_level",
+    "Field of Study ": "field_of_study",
+    "Current Employment Status ": "employment_status",
+    "Years of Professional Experience  ": "experience_years",
+    "Are you able to work remotely?": "remote_work",
+    "What Languages do you speak? ": "languages_raw",
+    "Are you seeking to relocate? ": "relocation_intent",
+    "If you're seeking to relocate, what would your main goal be?": "relocation_goal",
+    "Monthly Budget for Living Expenses (USD)  ": "budget_band",
+    "Ability to Pay for Relocation/Visa Fees": "visa_budget_ability",
+    "Preferred Regions for Relocation ": "preferred_regions",
+    "Cultural Preferences  ": "cultural_preference",
+    "Do you currently have a passport?": "passport_status_raw",
+    "Visa Restrictions  ": "visa_preference",
+    "Support Needed *": "support_needed",
+    "Medical or special needs to consider?  ": "special_needs",
+}
+
+
+def clean_budget(val):
+    """
+    Map budget ranges to approximate numeric values in USD.
+    """
+    if pd.isna(val):
+        return np.nan
+    s = str(val).replace(" ", "").replace("–", "-")  # normalize dash
+    if "<$200" in s:
+        return 150
+    if "$200-500" in s or "200-500" in s:
+        return 350
+    if "$500-1,000" in s or "500-1000" in s:
+        return 750
+    if "$1,000-2,500" in s or "1000-2500" in s:
+        return 1750
+    if "$2,500-5,000" in s or "2500-5000" in s:
+        return 3750
+    if ">$5,000" in s or ">5000" in s:
+        return 6000
+    return np.nan
+
+
+def clean_passport(val):
+    """
+    Normalize passport status to high level categories:
+    Valid, ExpiringSoon, Expired, None.
+    """
+    if pd.isna(val):
+        return "None"
+    s = str(val).strip().lower()
+    if "valid" in s:
+        return "Valid"
+    if "expire soon" in s or "within 6 months" in s:
+        return "ExpiringSoon"
+    if "expired" in s:
+        return "Expired"
+    return "None"
+
+
+def clean_remote(val):
+    """
+    Map remote work answer to a boolean flag.
+    """
+    if pd.isna(val):
+        return False
+    s = str(val).lower()
+    if "laptop" in s or "remotely" in s or "freelance" in s or "online" in s:
+        return True
+    return False
+
+
+def clean_responses(df_raw: pd.DataFrame) -> pd.DataFrame:
+    """
+    Rename the survey questions and add the cleaned helper columns
+    (budget_estimated_usd, passport_status, remote_capable, languages_clean).
+    """
+    df = df_raw.rename(columns=RENAME_MAP).copy()
+
+    df["budget_estimated_usd"] = df["budget_band"].apply(clean_budget)
+    df["passport_status"] = df["passport_status_raw"].apply(clean_passport)
+    df["remote_capable"] = df["remote_work"].apply(clean_remote)
+
+    # Clean language text to lower case, will later explode into flags
+    df["languages_clean"] = df["languages_raw"].fillna("").astype(str).str.lower()
+
+    return df
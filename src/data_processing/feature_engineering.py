@@ -0,0 +1,143 @@
+"""
+Feature engineering for the survey responses (notebook 03).
+
+build_feature_table turns cleaned_responses.csv into the model dataset
+final_model_dataset.csv: ordinal and numeric estimates, one hot encoded
+single choice questions and keyword flags for multi select questions.
+"""
+
+from __future__ import annotations
+
+import pandas as pd
+
+
+def encode_age_group(series: pd.Series) -> pd.Series:
+    mapping = {
+        "18-24": 1,
+        "25-34": 2,
+        "35-44": 3,
+        "45-54": 4,
+        "55+": 5,
+    }
+    return series.map(mapping)
+
+
+def one_hot(series: pd.Series, prefix: str) -> pd.DataFrame:
+    """
+    Simple one hot encoding using pandas get_dummies.
+    """
+    return pd.get_dummies(series, prefix=prefix)
+
+
+def multi_select_contains(series: pd.Series, options_map: dict) -> pd.DataFrame:
+    """
+    For multi select questions stored as text (often with commas or semicolons),
+    create one binary column per option using case insensitive substring search.
+
+    options_map: dict of {column_name: substring_to_search}
+    """
+    out = {}
+    s = series.fillna("").astype(str).str.lower()
+    for col_name, keyword in options_map.items():
+        out[col_name] = s.str.contains(keyword.lower(), na=False, regex=False)
+    return pd.DataFrame(out).astype(int)
+
+
+FIELD_MAP = {
+    "field_engineering": "engineering",
+    "field_healthcare": "medicine",
+    "field_business": "business",
+    "field_education": "education",
+    "field_it": "computer science",
+    "field_law": "law",
+    "field_other": "other",
+}
+
+LANG_MAP = {
+    "lang_arabic": "arabic",
+    "lang_english": "english",
+    "lang_french": "french",
+    "lang_german": "german",
+    "lang_italian": "italian",
+    "lang_spanish": "spanish",
+    "lang_other": ",",  # any separator to catch additional
+}
+
+PREF_MAP = {
+    "pref_gulf": "gulf",
+    "pref_east_africa": "east africa",
+    "pref_north_africa": "north africa",
+    "pref_europe": "europe",
+    "pref_uk_ireland": "uk / ireland",
+    "pref_canada": "canada",
+    "pref_usa": "usa",
+    "pref_asia": "asia",
+    "pref_anywhere": "anywhere",
+}
+
+DEPENDENTS_MAP = {"0": 0, "1": 1, "2": 2, "3-4": 3.5, "5+": 5}
+EXPERIENCE_MAP = {"0-1": 0.5, "2-4": 3, "5-7": 6, "8-10": 9, "10+": 12}
+VISA_ABILITY_MAP = {"Yes": 2, "Partially able": 1, "No": 0}
+
+
+def build_feature_table(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Encode the cleaned survey responses into the model feature table.
+    Columns that are missing from `df` are skipped, like in the notebook.
+    """
+    parts = [pd.DataFrame({"age_group_ord": encode_age_group(df.get("age_group"))}, index=df.index)]
+
+    def add_one_hot(col: str, prefix: str) -> None:
+        if col in df.columns:
+            parts.append(one_hot(df[col], prefix=prefix))
+
+    def add_column(name: str, values: pd.Series) -> None:
+        parts.append(values.rename(name).to_frame())
+
+    add_one_hot("gender", "gender")
+    add_one_hot("current_country", "current_country")
+    add_one_hot("reason_current_country", "reason_current")
+    add_one_hot("marital_status", "marital")
+
+    if "dependents" in df.columns:
+        add_one_hot("dependents", "dep_band")
+        add_column("dependents_estimated", df["dependents"].astype(str).map(DEPENDENTS_MAP))
+
+    add_one_hot("education_level", "edu")
+    if "field_of_study" in df.columns:
+        parts.append(multi_select_contains(df["field_of_study"], FIELD_MAP))
+    add_one_hot("employment_status", "employment")
+
+    if "experience_years" in df.columns:
+        add_one_hot("experience_years", "exp_years_band")
+        add_column("experience_years_est", df["experience_years"].map(EXPERIENCE_MAP))
+
+    if "remote_capable" in df.columns:
+        add_column("remote_capable", df["remote_capable"].astype(int))
+
+    lang_col = "languages_clean" if "languages_clean" in df.columns else "languages_raw"
+    if lang_col in df.columns:
+        parts.append(multi_select_contains(df[lang_col], LANG_MAP))
+
+    if "relocation_intent" in df.columns:
+        add_one_hot("relocation_intent", "intent")
+        add_column("actively_seeking", df["relocation_intent"].eq("Yes").astype(int))
+
+    add_one_hot("relocation_goal", "goal")
+
+    if "budget_estimated_usd" in df.columns:
+        add_column("budget_estimated_usd", df["budget_estimated_usd"])
+    add_one_hot("budget_band", "budget_band")
+    if "visa_budget_ability" in df.columns:
+        add_column("can_pay_visa_score", df["visa_budget_ability"].map(VISA_ABILITY_MAP))
+
+    if "preferred_regions" in df.columns:
+        parts.append(multi_select_contains(df["preferred_regions"], PREF_MAP))
+    add_one_hot("cultural_preference", "cult_pref")
+
+    add_one_hot("passport_status", "passport")
+    add_one_hot("visa_preference", "visa_pref")
+    add_one_hot("support_needed", "support")
+    add_one_hot("special_needs", "special_needs")
+
+    return pd.concat(parts, axis=1)
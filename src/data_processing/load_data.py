@@ -0,0 +1,20 @@
+"""
+Loading of the raw survey export.
+"""
+
+from __future__ import annotations
+
+from pathlib import Path
+
+import pandas as pd
+
+
+def load_raw_responses(path: Path) -> pd.DataFrame:
+    """
+    Load the raw survey responses, either the original Google Forms
+    export (.xlsx) or a CSV copy of it.
+    """
+    path = Path(path)
+    if path.suffix.lower() in (".xlsx", ".xls"):
+        return pd.read_excel(path)
+    return pd.read_csv(path)
@@ -0,0 +1,49 @@
+"""
+Ranking metrics for (users x destinations) score matrices (README, Step 4).
+
+Every function compares predicted scores with reference scores (e.g. the
+proxy labels) row by row, one row per user, and averages over users.
+"""
+
+from __future__ import annotations
+
+import numpy as np
+
+
+def rmse(y_true: np.ndarray, y_pred: np.ndarray) -> float:
+    """Root mean squared error over all pairs."""
+    return float(np.sqrt(np.mean((np.asarray(y_true) - np.asarray(y_pred)) ** 2)))
+
+
+def mean_reciprocal_rank(true_scores: np.ndarray, pred_scores: np.ndarray) -> float:
+    """
+    Mean of 1 / (predicted rank of each user's best reference destination).
+    """
+    best = np.argmax(true_scores, axis=1)
+    best_pred = np.take_along_axis(pred_scores, best[:, None], axis=1)
+    ranks = (pred_scores > best_pred).sum(axis=1) + 1
+    return float(np.mean(1.0 / ranks))
+
+
+def top_k_overlap(true_scores: np.ndarray, pred_scores: np.ndarray, k: int = 5) -> float:
+    """
+    Average share of each user's reference top-k found in the predicted top-k.
+    """
+    k = min(k, true_scores.shape[1])
+    true_top = np.argsort(-true_scores, axis=1, kind="stable")[:, :k]
+    pred_top = np.argsort(-pred_scores, axis=1, kind="stable")[:, :k]
+    hits = [len(np.intersect1d(t, p)) for t, p in zip(true_top, pred_top)]
+    return float(np.mean(hits) / k)
+
+
+def pairwise_accuracy(true_scores: np.ndarray, pred_scores: np.ndarray) -> float:
+    """
+    Share of destination pairs (per user, reference scores not tied) that
+    the predictions order the same way as the reference.
+    """
+    true_diff = true_scores[:, :, None] - true_scores[:, None, :]
+    pred_diff = pred_scores[:, :, None] - pred_scores[:, None, :]
+    strict = true_diff > 0
+    if not strict.any():
+        return float("nan")
+    return float(np.mean(pred_diff[strict] > 0))
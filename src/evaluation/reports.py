@@ -0,0 +1,89 @@
+"""
+Markdown summary of a pipeline run: user clusters, trained model and
+cross validation results.
+"""
+
+from __future__ import annotations
+
+from pathlib import Path
+from typing import List, Sequence
+
+import pandas as pd
+from sklearn.neural_network import MLPRegressor
+
+
+# Cluster profile columns shown in the report
+PROFILE_COLUMNS = [
+    "age_group_ord",
+    "dependents_estimated",
+    "budget_estimated_usd",
+    "remote_capable",
+    "actively_seeking",
+    "pref_gulf",
+    "pref_europe",
+]
+
+
+def _markdown_table(df: pd.DataFrame, float_format: str = "{:.3f}") -> List[str]:
+    def fmt(value) -> str:
+        return float_format.format(value) if isinstance(value, float) else str(value)
+
+    lines = [
+        "| " + " | ".join(str(c) for c in df.columns) + " |",
+        "|" + "---|" * len(df.columns),
+    ]
+    for row in df.itertuples(index=False):
+        lines.append("| " + " | ".join(fmt(v) for v in row) + " |")
+    return lines
+
+
+def build_pipeline_report(
+    clustered_df: pd.DataFrame,
+    cv_results: pd.DataFrame,
+    nn_model: MLPRegressor,
+    profile_columns: Sequence[str] = PROFILE_COLUMNS,
+) -> str:
+    """
+    Markdown report for one pipeline run.
+
+    Parameters
+    ----------
+    clustered_df : DataFrame
+        Model dataset with a `user_cluster` column.
+    cv_results : DataFrame
+        Output of cross_validate_nn (one row per fold).
+    nn_model : MLPRegressor
+        Model trained on all respondents.
+    """
+    lines = ["# Pipeline report", ""]
+
+    lines += ["## User clusters", ""]
+    cols = [c for c in profile_columns if c in clustered_df.columns]
+    profile = clustered_df.groupby("user_cluster")[cols].mean()
+    profile.insert(0, "n_users", clustered_df["user_cluster"].value_counts().sort_index())
+    lines += _markdown_table(profile.reset_index())
+    lines.append("")
+
+    lines += ["## Neural network", ""]
+    lines.append(f"- Hidden layers: {tuple(nn_model.hidden_layer_sizes)}")
+    lines.append(f"- Training iterations: {nn_model.n_iter_}")
+    lines.append(f"- Final training loss: {nn_model.loss_:.5f}")
+    lines.append("")
+
+    lines += [f"## Cross validation ({len(cv_results)} folds, grouped by user)", ""]
+    lines += _markdown_table(cv_results)
+    metrics = cv_results.drop(columns=["fold", "n_train_users", "n_test_users"], errors="ignore")
+    summary = pd.DataFrame(
+        {"metric": metrics.columns, "mean": metrics.mean().values, "std": metrics.std().values}
+    )
+    lines.append("")
+    lines += _markdown_table(summary)
+    lines.append("")
+
+    return "\n".join(lines)
+
+
+def write_report(report: str, path: Path) -> None:
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(report, encoding="utf-8")
@@ -0,0 +1,76 @@
+"""
+User segmentation with k-means (notebook 04).
+
+Respondents are clustered on the same user features that the recommender
+feeds to the NN, after standard scaling. The cluster label is stored as
+`user_cluster` in final_model_dataset_with_clusters.csv.
+"""
+
+from __future__ import annotations
+
+from typing import Optional, Sequence
+
+import numpy as np
+import pandas as pd
+from sklearn.cluster import KMeans
+from sklearn.preprocessing import StandardScaler
+
+
+CLUSTER_FEATURES = [
+    "age_group_ord",
+    "dependents_estimated",
+    "experience_years_est",
+    "budget_estimated_usd",
+    "remote_capable",
+    "actively_seeking",
+    "pref_gulf",
+    "pref_east_africa",
+    "pref_north_africa",
+    "pref_europe",
+    "pref_uk_ireland",
+    "pref_canada",
+    "pref_usa",
+    "pref_asia",
+    "pref_anywhere",
+]
+
+
+def cluster_users(
+    user_df: pd.DataFrame,
+    n_clusters: int = 9,
+    feature_cols: Optional[Sequence[str]] = None,
+    random_state: int = 42,
+) -> np.ndarray:
+    """
+    K-means cluster label for every respondent.
+
+    Parameters
+    ----------
+    user_df : DataFrame
+        Model dataset (final_model_dataset.csv).
+    n_clusters : int
+        Number of clusters.
+    feature_cols : sequence of str, optional
+        Columns to cluster on. Defaults to the CLUSTER_FEATURES present
+        in user_df.
+    random_state : int
+
+    Returns
+    -------
+    ndarray of int, shape (n_users,)
+    """
+    if feature_cols is None:
+        feature_cols = [c for c in CLUSTER_FEATURES if c in user_df.columns]
+    X = user_df[list(feature_cols)].apply(pd.to_numeric, errors="coerce")
+    X = X.fillna(X.median())
+    X_scaled = StandardScaler().fit_transform(X)
+    return KMeans(n_clusters=n_clusters, random_state=random_state, n_init="auto").fit_predict(
+        X_scaled
+    )
+
+
+def add_user_clusters(user_df: pd.DataFrame, **kwargs) -> pd.DataFrame:
+    """Copy of user_df with a `user_cluster` column (see cluster_users)."""
+    out = user_df.copy()
+    out["user_cluster"] = cluster_users(user_df, **kwargs)
+    return out
@@ -0,0 +1,81 @@
+"""
+K-fold cross validation of the suitability network (README, Step 4).
+
+Folds are split by respondent, so all pairs of a held out user are unseen
+during training. Each fold reports the error and the ranking metrics of
+src.evaluation.metrics against the proxy labels (the baseline heuristic
+the network is trained to imitate).
+"""
+
+from __future__ import annotations
+
+from typing import Optional, Sequence
+
+import numpy as np
+import pandas as pd
+from sklearn.model_selection import GroupKFold
+
+from .model_utils import (
+    NN_COUNTRY_FEATURES,
+    NN_USER_FEATURES,
+    build_training_pairs,
+    train_nn_model,
+)
+from ..evaluation.metrics import (
+    mean_reciprocal_rank,
+    pairwise_accuracy,
+    rmse,
+    top_k_overlap,
+)
+from ..utils.config_utils import ScoringPlan
+
+
+def cross_validate_nn(
+    user_df: pd.DataFrame,
+    country_df: pd.DataFrame,
+    n_splits: int = 5,
+    top_k: int = 5,
+    user_feature_cols: Sequence[str] = NN_USER_FEATURES,
+    country_feature_cols: Sequence[str] = NN_COUNTRY_FEATURES,
+    scoring_plan: Optional[ScoringPlan] = None,
+    **train_kwargs,
+) -> pd.DataFrame:
+    """
+    Grouped k-fold CV over respondents.
+
+    Extra keyword arguments are passed to train_nn_model.
+
+    Returns
+    -------
+    DataFrame
+        One row per fold with columns [fold, n_train_users, n_test_users,
+        rmse, mrr, top_k_overlap, pairwise_accuracy].
+    """
+    X, y, user_index = build_training_pairs(
+        user_df, country_df, user_feature_cols, country_feature_cols, scoring_plan
+    )
+    n_countries = len(country_df)
+
+    rows = []
+    for fold, (train_idx, test_idx) in enumerate(
+        GroupKFold(n_splits=n_splits).split(X, y, groups=user_index)
+    ):
+        scaler, nn_model = train_nn_model(X.iloc[train_idx], y[train_idx], **train_kwargs)
+        pred = nn_model.predict(scaler.transform(X.iloc[test_idx]))
+
+        # Pairs are user-major, so each test user is a block of n_countries rows
+        true_scores = y[test_idx].reshape(-1, n_countries)
+        pred_scores = pred.reshape(-1, n_countries)
+        rows.append(
+            {
+                "fold": fold,
+                "n_train_users": len(np.unique(user_index[train_idx])),
+                "n_test_users": len(true_scores),
+                "rmse": rmse(true_scores, pred_scores),
+                "mrr": mean_reciprocal_rank(true_scores, pred_scores),
+                "top_k_overlap": top_k_overlap(true_scores, pred_scores, top_k),
+                "pairwise_accuracy": pairwise_accuracy(true_scores, pred_scores),
+            }
+        )
+
+    return pd.DataFrame(rows)
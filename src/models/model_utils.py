@@ -0,0 +1,108 @@
+"""
+Training of the (user, destination) suitability network (notebook 05).
+
+There is no ground truth "best destination" label, so the network is
+trained on proxy labels: the baseline heuristic score of every pair of
+respondent and catalog destination (README, Step 3.2). The trained
+scaler and MLPRegressor are the nn_scaler.joblib / nn_model.joblib files
+loaded by the recommender.
+"""
+
+from __future__ import annotations
+
+from typing import Optional, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+from sklearn.neural_network import MLPRegressor
+from sklearn.preprocessing import StandardScaler
+
+from ..utils.config_utils import DEFAULT_SCORING_PLAN, ScoringPlan
+
+
+# Model inputs, in the order the fitted scaler expects them
+NN_USER_FEATURES = [
+    "age_group_ord",
+    "dependents_estimated",
+    "experience_years_est",
+    "budget_estimated_usd",
+    "remote_capable",
+    "actively_seeking",
+    "pref_gulf",
+    "pref_europe",
+    "pref_canada",
+    "pref_usa",
+    "pref_anywhere",
+]
+
+NN_COUNTRY_FEATURES = [
+    "safety_index",
+    "cost_of_living_index",
+    "diaspora_presence_score",
+    "visa_policy_sudanese_score",
+    "cultural_compatibility_score",
+    "min_budget_required",
+]
+
+
+def build_training_pairs(
+    user_df: pd.DataFrame,
+    country_df: pd.DataFrame,
+    user_feature_cols: Sequence[str] = NN_USER_FEATURES,
+    country_feature_cols: Sequence[str] = NN_COUNTRY_FEATURES,
+    scoring_plan: Optional[ScoringPlan] = None,
+) -> Tuple[pd.DataFrame, np.ndarray, np.ndarray]:
+    """
+    All (user, destination) pairs with their proxy labels.
+
+    Returns
+    -------
+    X : DataFrame of shape (n_users * n_countries, n_features)
+        User columns followed by destination columns, user-major rows.
+    y : ndarray of shape (n_users * n_countries,)
+        Baseline proxy score of each pair.
+    user_index : ndarray of shape (n_users * n_countries,)
+        Position of each pair's user in user_df (for grouped CV folds).
+    """
+    plan = scoring_plan or DEFAULT_SCORING_PLAN
+    n_users, n_countries = len(user_df), len(country_df)
+
+    user_values = user_df[list(user_feature_cols)].to_numpy(dtype=float)
+    country_values = country_df[list(country_feature_cols)].to_numpy(dtype=float)
+    X = pd.DataFrame(
+        np.hstack(
+            [
+                np.repeat(user_values, n_countries, axis=0),
+                np.tile(country_values, (n_users, 1)),
+            ]
+        ),
+        columns=list(user_feature_cols) + list(country_feature_cols),
+    )
+    y = plan.score_matrix(user_df, country_df).ravel()
+    user_index = np.repeat(np.arange(n_users), n_countries)
+    return X, y, user_index
+
+
+def train_nn_model(
+    X: pd.DataFrame,
+    y: np.ndarray,
+    hidden_layer_sizes: Sequence[int] = (64, 32),
+    max_iter: int = 500,
+    random_state: int = 42,
+) -> Tuple[StandardScaler, MLPRegressor]:
+    """
+    Fit the input scaler and the MLPRegressor on training pairs.
+
+    Returns
+    -------
+    scaler : StandardScaler
+    nn_model : MLPRegressor
+    """
+    scaler = StandardScaler().fit(X)
+    nn_model = MLPRegressor(
+        hidden_layer_sizes=tuple(hidden_layer_sizes),
+        max_iter=max_iter,
+        random_state=random_state,
+    )
+    nn_model.fit(scaler.transform(X), y)
+    return scaler, nn_model
@@ -0,0 +1,158 @@
+"""
+NumPy forward pass for the trained MLPRegressor.
+
+sklearn keeps the layer-by-layer computation internal to predict(). This
+module re-implements it directly on the fitted weights (coefs_ and
+intercepts_) so that other modules can:
+- keep the hidden activations of a batch (for backpropagation)
+- reuse partial results instead of calling predict repeatedly
+"""
+
+from __future__ import annotations
+
+from typing import Callable, Dict, List, Optional, Tuple, Union
+
+import numpy as np
+from sklearn.neural_network import MLPRegressor
+
+
+def _identity(x: np.ndarray) -> np.ndarray:
+    return x
+
+
+def _relu(x: np.ndarray) -> np.ndarray:
+    return np.maximum(x, 0.0)
+
+
+def _tanh(x: np.ndarray) -> np.ndarray:
+    return np.tanh(x)
+
+
+def _logistic(x: np.ndarray) -> np.ndarray:
+    return 1.0 / (1.0 + np.exp(-x))
+
+
+ACTIVATIONS: Dict[str, Callable[[np.ndarray], np.ndarray]] = {
+    "identity": _identity,
+    "relu": _relu,
+    "tanh": _tanh,
+    "logistic": _logistic,
+}
+
+# Derivatives expressed in terms of the activation *output* a = f(z),
+# which is what the forward pass keeps around.
+ACTIVATION_DERIVATIVES: Dict[str, Callable[[np.ndarray], np.ndarray]] = {
+    "identity": lambda a: np.ones_like(a),
+    "relu": lambda a: (a > 0).astype(a.dtype),
+    "tanh": lambda a: 1.0 - a**2,
+    "logistic": lambda a: a * (1.0 - a),
+}
+
+
+def layer_activation_names(nn_model: MLPRegressor) -> List[str]:
+    """
+    Activation function name for every layer of the network
+    (hidden layers first, output layer last).
+    """
+    n_layers = len(nn_model.coefs_)
+    return [nn_model.activation] * (n_layers - 1) + [nn_model.out_activation_]
+
+
+def mlp_forward(
+    nn_model: MLPRegressor,
+    X_scaled: np.ndarray,
+    return_activations: bool = False,
+) -> Union[np.ndarray, Tuple[np.ndarray, List[np.ndarray]]]:
+    """
+    Forward pass of a fitted MLPRegressor using its weights directly.
+
+    Parameters
+    ----------
+    nn_model : MLPRegressor
+        Fitted neural network model.
+    X_scaled : ndarray of shape (n_rows, n_features)
+        Model inputs, already aligned and scaled like in training.
+    return_activations : bool
+        If True, also return the list of layer outputs
+        [X_scaled, hidden_1, ..., output].
+
+    Returns
+    -------
+    ndarray
+        Predictions with the same shape as nn_model.predict(X_scaled).
+    list[ndarray], optional
+        Layer outputs, only when return_activations is True.
+    """
+    a = np.asarray(X_scaled, dtype=float)
+    activations = [a]
+
+    for W, b, act_name in zip(
+        nn_model.coefs_, nn_model.intercepts_, layer_activation_names(nn_model)
+    ):
+        a = ACTIVATIONS[act_name](a @ W + b)
+        activations.append(a)
+
+    preds = a[:, 0] if a.shape[1] == 1 else a
+
+    if return_activations:
+        return preds, activations
+    return preds
+
+
+def apply_activation_inplace(act_name: str, a: np.ndarray) -> np.ndarray:
+    """Apply an activation function to `a` without allocating a new array."""
+    if act_name == "relu":
+        np.maximum(a, 0.0, out=a)
+    elif act_name == "tanh":
+        np.tanh(a, out=a)
+    elif act_name == "logistic":
+        np.negative(a, out=a)
+        np.exp(a, out=a)
+        a += 1.0
+        np.reciprocal(a, out=a)
+    elif act_name != "identity":
+        raise ValueError(f"Unknown activation '{act_name}'")
+    return a
+
+
+def mlp_forward_from_first_layer(
+    nn_model: MLPRegressor,
+    first_pre_activation: np.ndarray,
+    buffers: Optional[List[np.ndarray]] = None,
+) -> np.ndarray:
+    """
+    Finish a forward pass from the first layer's pre-activation (X @ W1 + b1).
+
+    Because the first layer is linear in its inputs, callers can split it
+    into parts computed once (e.g. destination features) and parts computed
+    per request (e.g. user features), and only run the rest of the network
+    here.
+
+    Parameters
+    ----------
+    nn_model : MLPRegressor
+        Fitted neural network model.
+    first_pre_activation : ndarray of shape (n_rows, hidden_1)
+        Overwritten in place with the first hidden layer's output.
+    buffers : list of ndarray, optional
+        Preallocated outputs for layers 2..L, shapes (n_rows, layer_width).
+        When given, no arrays are allocated.
+
+    Returns
+    -------
+    ndarray of shape (n_rows,)
+        NN scores (a view into the last buffer when buffers are given).
+    """
+    act_names = layer_activation_names(nn_model)
+    a = apply_activation_inplace(act_names[0], first_pre_activation)
+
+    for layer in range(1, len(nn_model.coefs_)):
+        W, b = nn_model.coefs_[layer], nn_model.intercepts_[layer]
+        if buffers is None:
+            out = a @ W
+        else:
+            out = np.matmul(a, W, out=buffers[layer - 1])
+        out += b
+        a = apply_activation_inplace(act_names[layer], out)
+
+    return a[:, 0]
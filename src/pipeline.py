@@ -0,0 +1,510 @@
+"""
+Cached pipeline runner: clean -> features -> cluster / train / CV -> report.
+
+The notebooks 01-05 are run by hand and each re-reads the CSVs written by
+the previous one. This module declares the same steps as a DAG of stages
+with the file paths of src/config.py:
+
+    clean     RAW_DATA                    -> CLEAN_DATA
+    features  CLEAN_DATA                  -> PROCESSED_DATA
+    cluster   PROCESSED_DATA              -> CLUSTERED_DATA
+    train     PROCESSED_DATA + countries  -> MODELS_DIR/nn_{model,scaler}.joblib
+    cv        PROCESSED_DATA + countries  -> REPORTS_DIR/cv_results.csv
+    report    cluster + train + cv        -> REPORTS_DIR/pipeline_report.md
+
+Dependencies follow from the paths: a stage depends on the stages that
+write its inputs. Every stage is keyed by a hash of its input files, its
+code and its parameters; outputs are stored under that key in
+PIPELINE_CACHE_DIR, so an unchanged stage is skipped (or restored from
+the cache) instead of re-run. Stages whose dependencies are done run in
+parallel worker processes, and a per-stage timing summary is printed.
+
+Usage (from project root):
+
+    python -m src.pipeline --jobs 3
+    python -m src.pipeline --force train
+    python -m src.pipeline --path RAW_DATA=path/to/responses.xlsx
+"""
+
+from __future__ import annotations
+
+import argparse
+import hashlib
+import inspect
+import json
+import shutil
+import sys
+import time
+import traceback
+from concurrent.futures import FIRST_COMPLETED, Future, ProcessPoolExecutor, wait
+from dataclasses import dataclass, field
+from importlib.util import find_spec
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Mapping, Optional, Sequence, Tuple
+
+import joblib
+import pandas as pd
+
+from . import config
+
+
+# ----------------------------------------------------------------------
+# Stage functions: func(inputs, outputs, **params), paths in, files out
+# ----------------------------------------------------------------------
+
+
+def run_cleaning(inputs: Dict[str, Path], outputs: Dict[str, Path]) -> None:
+    from .data_processing.cleaning import clean_responses
+    from .data_processing.load_data import load_raw_responses
+    from .utils.io_utils import save_dataframe
+
+    save_dataframe(clean_responses(load_raw_responses(inputs["raw"])), outputs["clean"])
+
+
+def run_feature_engineering(inputs: Dict[str, Path], outputs: Dict[str, Path]) -> None:
+    from .data_processing.feature_engineering import build_feature_table
+    from .utils.io_utils import save_dataframe
+
+    save_dataframe(build_feature_table(pd.read_csv(inputs["clean"])), outputs["features"])
+
+
+def run_clustering(
+    inputs: Dict[str, Path],
+    outputs: Dict[str, Path],
+    n_clusters: int = 9,
+    random_state: int = config.RANDOM_SEED,
+) -> None:
+    from .models.clustering import add_user_clusters
+    from .utils.io_utils import save_dataframe
+
+    user_df = pd.read_csv(inputs["features"])
+    clustered = add_user_clusters(user_df, n_clusters=n_clusters, random_state=random_state)
+    save_dataframe(clustered, outputs["clustered"])
+
+
+def run_training(
+    inputs: Dict[str, Path],
+    outputs: Dict[str, Path],
+    hidden_layer_sizes: Sequence[int] = (64, 32),
+    max_iter: int = 500,
+    random_state: int = config.RANDOM_SEED,
+) -> None:
+    from .models.model_utils import build_training_pairs, train_nn_model
+    from .utils.config_utils import load_scoring_config
+
+    X, y, _ = build_training_pairs(
+        pd.read_csv(inputs["features"]),
+        pd.read_csv(inputs["countries"]),
+        scoring_plan=load_scoring_config(inputs["scoring_config"]),
+    )
+    scaler, nn_model = train_nn_model(
+        X, y, hidden_layer_sizes=hidden_layer_sizes, max_iter=max_iter, random_state=random_state
+    )
+    joblib.dump(nn_model, outputs["model"])
+    joblib.dump(scaler, outputs["scaler"])
+
+
+def run_cross_validation(
+    inputs: Dict[str, Path],
+    outputs: Dict[str, Path],
+    n_splits: int = 5,
+    top_k: int = 5,
+    hidden_layer_sizes: Sequence[int] = (64, 32),
+    max_iter: int = 500,
+    random_state: int = config.RANDOM_SEED,
+) -> None:
+    from .models.cross_validation import cross_validate_nn
+    from .utils.config_utils import load_scoring_config
+    from .utils.io_utils import save_dataframe
+
+    cv_results = cross_validate_nn(
+        pd.read_csv(inputs["features"]),
+        pd.read_csv(inputs["countries"]),
+        n_splits=n_splits,
+        top_k=top_k,
+        scoring_plan=load_scoring_config(inputs["scoring_config"]),
+        hidden_layer_sizes=hidden_layer_sizes,
+        max_iter=max_iter,
+        random_state=random_state,
+    )
+    save_dataframe(cv_results, outputs["cv"])
+
+
+def run_report(inputs: Dict[str, Path], outputs: Dict[str, Path]) -> None:
+    from .evaluation.reports import build_pipeline_report, write_report
+
+    report = build_pipeline_report(
+        pd.read_csv(inputs["clustered"]),
+        pd.read_csv(inputs["cv"]),
+        joblib.load(inputs["model"]),
+    )
+    write_report(report, outputs["report"])
+
+
+# ----------------------------------------------------------------------
+# Stage declarations
+# ----------------------------------------------------------------------
+
+
+@dataclass(frozen=True)
+class Stage:
+    """
+    One step of the pipeline.
+
+    `code` lists the modules whose source, together with the stage
+    function itself, is part of the cache key.
+    """
+
+    name: str
+    func: Callable[..., None]
+    inputs: Dict[str, Path]
+    outputs: Dict[str, Path]
+    params: Dict[str, Any] = field(default_factory=dict)
+    code: Tuple[str, ...] = ()
+
+
+def default_paths() -> Dict[str, Path]:
+    """Pipeline file locations, taken from src/config.py."""
+    return {
+        "RAW_DATA": config.RAW_DATA,
+        "CLEAN_DATA": config.CLEAN_DATA,
+        "PROCESSED_DATA": config.PROCESSED_DATA,
+        "CLUSTERED_DATA": config.CLUSTERED_DATA,
+        "COUNTRY_FEATURES_CSV": config.COUNTRY_FEATURES_CSV,
+        "SCORING_CONFIG": config.SCORING_CONFIG,
+        "MODELS_DIR": config.MODELS_DIR,
+        "REPORTS_DIR": config.REPORTS_DIR,
+    }
+
+
+def build_stages(
+    paths: Optional[Mapping[str, Path]] = None,
+    params: Optional[Mapping[str, Mapping[str, Any]]] = None,
+) -> List[Stage]:
+    """
+    The pipeline DAG.
+
+    Parameters
+    ----------
+    paths : mapping, optional
+        Overrides for default_paths() (same keys).
+    params : mapping, optional
+        Stage name -> keyword arguments overriding the stage defaults.
+    """
+    p = {**default_paths(), **{k: Path(v) for k, v in (paths or {}).items()}}
+    params = params or {}
+    model_params = {"hidden_layer_sizes": [64, 32], "max_iter": 500, "random_state": config.RANDOM_SEED}
+    countries = {"countries": p["COUNTRY_FEATURES_CSV"], "scoring_config": p["SCORING_CONFIG"]}
+
+    stages = [
+        Stage(
+            "clean",
+            run_cleaning,
+            inputs={"raw": p["RAW_DATA"]},
+            outputs={"clean": p["CLEAN_DATA"]},
+            code=("src.data_processing.cleaning", "src.data_processing.load_data"),
+        ),
+        Stage(
+            "features",
+            run_feature_engineering,
+            inputs={"clean": p["CLEAN_DATA"]},
+            outputs={"features": p["PROCESSED_DATA"]},
+            code=("src.data_processing.feature_engineering",),
+        ),
+        Stage(
+            "cluster",
+            run_clustering,
+            inputs={"features": p["PROCESSED_DATA"]},
+            outputs={"clustered": p["CLUSTERED_DATA"]},
+            params={"n_clusters": 9, "random_state": config.RANDOM_SEED},
+            code=("src.models.clustering",),
+        ),
+        Stage(
+            "train",
+            run_training,
+            inputs={"features": p["PROCESSED_DATA"], **countries},
+            outputs={
+                "model": p["MODELS_DIR"] / "nn_model.joblib",
+                "scaler": p["MODELS_DIR"] / "nn_scaler.joblib",
+            },
+            params=dict(model_params),
+            code=("src.models.model_utils", "src.utils.config_utils"),
+        ),
+        Stage(
+            "cv",
+            run_cross_validation,
+            inputs={"features": p["PROCESSED_DATA"], **countries},
+            outputs={"cv": p["REPORTS_DIR"] / "cv_results.csv"},
+            params={"n_splits": 5, "top_k": 5, **model_params},
+            code=(
+                "src.models.cross_validation",
+                "src.models.model_utils",
+                "src.evaluation.metrics",
+                "src.utils.config_utils",
+            ),
+        ),
+        Stage(
+            "report",
+            run_report,
+            inputs={
+                "clustered": p["CLUSTERED_DATA"],
+                "cv": p["REPORTS_DIR"] / "cv_results.csv",
+                "model": p["MODELS_DIR"] / "nn_model.joblib",
+            },
+            outputs={"report": p["REPORTS_DIR"] / "pipeline_report.md"},
+            code=("src.evaluation.reports",),
+        ),
+    ]
+
+    unknown = set(params) - {s.name for s in stages}
+    if unknown:
+        raise ValueError(f"Unknown stage(s) in params: {sorted(unknown)}")
+    return [
+        Stage(s.name, s.func, s.inputs, s.outputs, {**s.params, **params.get(s.name, {})}, s.code)
+        for s in stages
+    ]
+
+
+# ----------------------------------------------------------------------
+# Hashing and cache
+# ----------------------------------------------------------------------
+
+
+def _file_digest(path: Path) -> str:
+    h = hashlib.sha1()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+def _code_digest(stage: Stage) -> str:
+    h = hashlib.sha1(inspect.getsource(stage.func).encode("utf-8"))
+    for module_name in stage.code:
+        h.update(Path(find_spec(module_name).origin).read_bytes())
+    return h.hexdigest()
+
+
+def stage_key(stage: Stage) -> str:
+    """Cache key of a stage: hash of its input files, code and parameters."""
+    payload = {
+        "stage": stage.name,
+        "inputs": {name: _file_digest(path) for name, path in sorted(stage.inputs.items())},
+        "code": _code_digest(stage),
+        "params": stage.params,
+    }
+    return hashlib.sha1(json.dumps(payload, sort_keys=True, default=str).encode()).hexdigest()
+
+
+def _cache_entry(cache_dir: Path, stage: Stage, key: str) -> Path:
+    return cache_dir / stage.name / key
+
+
+def _load_from_cache(entry: Path, stage: Stage) -> Optional[str]:
+    """
+    "cached" if the outputs on disk already match the cache entry,
+    "restored" if they were copied back from it, None on a cache miss.
+    """
+    manifest_path = entry / "manifest.json"
+    if not manifest_path.exists():
+        return None
+    digests = json.loads(manifest_path.read_text())["outputs"]
+
+    if all(
+        path.exists() and _file_digest(path) == digests[name]
+        for name, path in stage.outputs.items()
+    ):
+        return "cached"
+    for name, path in stage.outputs.items():
+        path.parent.mkdir(parents=True, exist_ok=True)
+        shutil.copy2(entry / name, path)
+    return "restored"
+
+
+def _store_in_cache(entry: Path, stage: Stage) -> None:
+    entry.mkdir(parents=True, exist_ok=True)
+    digests = {}
+    for name, path in stage.outputs.items():
+        shutil.copy2(path, entry / name)
+        digests[name] = _file_digest(path)
+    (entry / "manifest.json").write_text(json.dumps({"outputs": digests}, indent=2))
+
+
+def _execute(stage: Stage) -> float:
+    """Run one stage (in a worker process) and return its duration."""
+    for path in stage.outputs.values():
+        path.parent.mkdir(parents=True, exist_ok=True)
+    start = time.perf_counter()
+    stage.func(stage.inputs, stage.outputs, **stage.params)
+    return time.perf_counter() - start
+
+
+# ----------------------------------------------------------------------
+# Scheduler
+# ----------------------------------------------------------------------
+
+
+def stage_dependencies(stages: Sequence[Stage]) -> Dict[str, List[str]]:
+    """Stage name -> names of the stages that write its inputs."""
+    producers: Dict[Path, str] = {}
+    for stage in stages:
+        for path in stage.outputs.values():
+            if path in producers:
+                raise ValueError(f"{path} is written by both '{producers[path]}' and '{stage.name}'")
+            producers[path] = stage.name
+
+    deps = {
+        stage.name: sorted({producers[p] for p in stage.inputs.values() if p in producers})
+        for stage in stages
+    }
+
+    # Reject cycles (depth first search)
+    state: Dict[str, int] = {}
+
+    def visit(name: str) -> None:
+        if state.get(name) == 1:
+            raise ValueError(f"Pipeline has a dependency cycle through '{name}'")
+        if state.get(name) == 2:
+            return
+        state[name] = 1
+        for dep in deps[name]:
+            visit(dep)
+        state[name] = 2
+
+    for name in deps:
+        visit(name)
+    return deps
+
+
+def run_pipeline(
+    stages: Sequence[Stage],
+    cache_dir: Path = config.PIPELINE_CACHE_DIR,
+    jobs: int = 3,
+    force: Sequence[str] = (),
+) -> pd.DataFrame:
+    """
+    Run the stages in dependency order, skipping those with a cache hit.
+
+    Parameters
+    ----------
+    stages : sequence of Stage
+        Pipeline, e.g. build_stages().
+    cache_dir : Path
+        Root of the content-addressed output cache.
+    jobs : int
+        Number of worker processes for stages that can run in parallel.
+    force : sequence of str
+        Stage names to re-run even on a cache hit ("all" for every stage).
+
+    Returns
+    -------
+    DataFrame
+        One row per stage with columns [stage, status, seconds, note].
+        status is one of "ran", "cached", "restored", "existing",
+        "failed" or "skipped" (a dependency failed).
+    """
+    cache_dir = Path(cache_dir)
+    by_name = {s.name: s for s in stages}
+    deps = stage_dependencies(stages)
+    forced = set(by_name) if "all" in force else set(force)
+    unknown = forced - set(by_name)
+    if unknown:
+        raise ValueError(f"Unknown stage(s) to force: {sorted(unknown)}")
+
+    results: Dict[str, Dict[str, Any]] = {}
+    running: Dict[Future, Tuple[Stage, str]] = {}
+    ok = {"ran", "cached", "restored", "existing"}
+
+    def finish(name: str, status: str, seconds: float = 0.0, note: str = "") -> None:
+        results[name] = {"stage": name, "status": status, "seconds": seconds, "note": note}
+        print(f"[{name}] {status}" + (f" ({seconds:.2f}s)" if seconds else "") + (f": {note}" if note else ""))
+
+    def start(stage: Stage, executor: ProcessPoolExecutor) -> None:
+        t0 = time.perf_counter()
+        missing = [p for p in stage.inputs.values() if not p.exists()]
+        if missing:
+            produced = any(p in missing for dep in deps[stage.name] for p in by_name[dep].outputs.values())
+            if not produced and all(p.exists() for p in stage.outputs.values()):
+                # Source data not available here, keep the outputs already on disk
+                finish(stage.name, "existing", note=f"input {missing[0]} not found, using existing outputs")
+            else:
+                finish(stage.name, "failed", note=f"input {missing[0]} not found")
+            return
+
+        key = stage_key(stage)
+        entry = _cache_entry(cache_dir, stage, key)
+        if stage.name not in forced:
+            status = _load_from_cache(entry, stage)
+            if status is not None:
+                finish(stage.name, status, time.perf_counter() - t0, f"key {key[:8]}")
+                return
+        running[executor.submit(_execute, stage)] = (stage, key)
+
+    with ProcessPoolExecutor(max_workers=jobs) as executor:
+        while len(results) < len(stages):
+            for stage in stages:
+                if stage.name in results or any(s.name == stage.name for s, _ in running.values()):
+                    continue
+                dep_status = [results.get(d, {}).get("status") for d in deps[stage.name]]
+                if any(s is None for s in dep_status):
+                    continue
+                if all(s in ok for s in dep_status):
+                    start(stage, executor)
+                else:
+                    finish(stage.name, "skipped", note="a dependency failed")
+
+            if not running:
+                continue
+            done, _ = wait(list(running), return_when=FIRST_COMPLETED)
+            for future in done:
+                stage, key = running.pop(future)
+                try:
+                    seconds = future.result()
+                except Exception as exc:
+                    traceback.print_exception(type(exc), exc, exc.__traceback__)
+                    finish(stage.name, "failed", note=f"{type(exc).__name__}: {exc}")
+                    continue
+                _store_in_cache(_cache_entry(cache_dir, stage, key), stage)
+                finish(stage.name, "ran", seconds, f"key {key[:8]}")
+
+    return pd.DataFrame([results[s.name] for s in stages], columns=["stage", "status", "seconds", "note"])
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run the data / model pipeline with caching.")
+    parser.add_argument("--jobs", type=int, default=3, help="Parallel worker processes")
+    parser.add_argument(
+        "--force", nargs="*", default=[], help="Stages to re-run even if cached ('all' for every stage)"
+    )
+    parser.add_argument("--cache-dir", type=str, default=str(config.PIPELINE_CACHE_DIR))
+    parser.add_argument(
+        "--path",
+        action="append",
+        default=[],
+        metavar="NAME=PATH",
+        help="Override a src/config.py path, e.g. --path RAW_DATA=data/raw/responses.xlsx",
+    )
+    args = parser.parse_args()
+
+    paths = {}
+    for item in args.path:
+        name, sep, value = item.partition("=")
+        if not sep or name not in default_paths():
+            parser.error(f"--path expects NAME=PATH with NAME in {sorted(default_paths())}")
+        paths[name] = Path(value)
+    start = time.perf_counter()
+    summary = run_pipeline(
+        build_stages(paths), cache_dir=Path(args.cache_dir), jobs=args.jobs, force=args.force
+    )
+    wall = time.perf_counter() - start
+
+    print("\nStage timings:")
+    print(summary.to_string(index=False, float_format=lambda x: f"{x:.2f}"))
+    print(f"Total wall time: {wall:.2f}s (sum of stages {summary['seconds'].sum():.2f}s)")
+
+    if not summary["status"].isin(["ran", "cached", "restored", "existing"]).all():
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,426 @@
+"""
+Batch scoring store for the Sudanese relocation recommender.
+
+Scores every user in the survey dataset against every destination once
+and keeps the full per-user score vectors (users x destinations) together
+with each user's top-k list. When rows of country_features.csv change,
+only the changed destination columns are re-scored for all users, the
+affected top-k lists are patched, and a diff of who gained or lost a
+destination is returned.
+
+The store records a fingerprint of the NN that produced its scores;
+a country delta against any other model is refused, since re-scoring
+only the changed columns would mix scores from two models. After a
+model change, rebuild the store with a full score_all.
+
+Usage (from project root):
+
+    python -m src.recommendation.batch_scoring build --store batch_scores.joblib
+    python -m src.recommendation.batch_scoring country-delta \\
+        --store batch_scores.joblib --country-file data/external/country_features.csv
+"""
+
+from __future__ import annotations
+
+import argparse
+import hashlib
+from pathlib import Path
+from typing import List, Optional, Sequence, Union
+
+import joblib
+import numpy as np
+import pandas as pd
+from sklearn.neural_network import MLPRegressor
+from sklearn.preprocessing import StandardScaler
+
+from .scoring import PairFeatureLayout, baseline_score_matrix
+from ..utils.config_utils import DEFAULT_SCORING_PLAN, ScoringPlan
+
+
+# Maximum number of (user, destination) pairs scored in one NN batch
+MAX_PAIRS_PER_BATCH = 200_000
+
+
+def model_fingerprint(nn_model: MLPRegressor) -> str:
+    """Short hash of a fitted network's weights and activations."""
+    h = hashlib.sha1(f"{nn_model.activation}/{nn_model.out_activation_}".encode("utf-8"))
+    for W, b in zip(nn_model.coefs_, nn_model.intercepts_):
+        h.update(np.ascontiguousarray(W, dtype=float).tobytes())
+        h.update(np.ascontiguousarray(b, dtype=float).tobytes())
+    return h.hexdigest()[:12]
+
+
+class BatchScoreStore:
+    """
+    Per-user score vectors for a whole user dataset and destination catalog.
+
+    Missing values are handled like FastRecommender does, so stored
+    scores equal what the app shows the same user: missing or
+    non-numeric user values are 0 for the NN and drop the baseline's
+    budget term; missing destination values are filled with the catalog
+    medians at build time. Those medians are kept so that later country
+    deltas are filled the same way.
+
+    Attributes
+    ----------
+    user_ids : ndarray (n_users,)
+    country_df : DataFrame
+        Destination catalog the scores refer to (one column per row).
+    nn_scores, baseline_scores, final_scores : ndarray (n_users, n_countries)
+    top_k_pos : ndarray (n_users, top_k)
+        Positions (in country_df) of each user's top-k destinations, best first.
+    model_fingerprint : str or None
+        model_fingerprint() of the NN used by the last score_all
+        (None before the first one).
+    """
+
+    def __init__(
+        self,
+        user_df: pd.DataFrame,
+        country_df: pd.DataFrame,
+        user_feature_cols: Sequence[str],
+        country_feature_cols: Sequence[str],
+        scaler: StandardScaler,
+        alpha: float = 0.5,
+        top_k: int = 5,
+        id_col: str = "country_code",
+        user_id_col: Optional[str] = None,
+        scoring_plan: Optional[ScoringPlan] = None,
+    ):
+        self.layout = PairFeatureLayout(scaler, user_feature_cols, country_feature_cols, id_col)
+        self.alpha = alpha
+        self.top_k = top_k
+        self.id_col = id_col
+        self.scoring_plan = scoring_plan or DEFAULT_SCORING_PLAN
+
+        self.user_ids = (
+            user_df[user_id_col].to_numpy() if user_id_col else user_df.index.to_numpy()
+        )
+        # Raw user columns needed by the NN and the baseline plan
+        user_cols = list(
+            dict.fromkeys(self.layout.user_cols + self._plan_user_cols())
+        )
+        self.user_frame = (
+            user_df.reindex(columns=user_cols)
+            .apply(pd.to_numeric, errors="coerce")
+            .reset_index(drop=True)
+        )
+
+        self.country_medians = (
+            country_df[self.layout.country_cols].apply(pd.to_numeric, errors="coerce").median()
+        )
+        self.country_df = country_df.reset_index(drop=True).copy()
+
+        self.nn_scores = np.empty((len(self.user_ids), 0))
+        self.baseline_scores = np.empty((len(self.user_ids), 0))
+        self.final_scores = np.empty((len(self.user_ids), 0))
+        self.top_k_pos = np.empty((len(self.user_ids), 0), dtype=int)
+        self.model_fingerprint: Optional[str] = None
+
+    def _plan_user_cols(self) -> List[str]:
+        return [user_col for user_col, _, _ in self.scoring_plan.budget_terms]
+
+    @property
+    def weights_version(self) -> str:
+        return self.scoring_plan.version
+
+    @property
+    def country_ids(self) -> np.ndarray:
+        if self.id_col in self.country_df.columns:
+            return self.country_df[self.id_col].to_numpy()
+        return self.country_df.index.to_numpy()
+
+    # ------------------------------------------------------------------
+    # Scoring
+    # ------------------------------------------------------------------
+
+    def _score_columns(
+        self, country_rows: pd.DataFrame, nn_model: MLPRegressor
+    ) -> tuple:
+        """NN, baseline and final scores of all users against country_rows."""
+        layout = self.layout
+        country_values = (
+            country_rows[layout.country_cols]
+            .apply(pd.to_numeric, errors="coerce")
+            .fillna(self.country_medians)
+            .to_numpy(dtype=float)
+        )
+        country_scaled = layout.scale_country(country_values)
+        user_values = self.user_frame[layout.user_cols].to_numpy(dtype=float)
+        user_scaled = layout.scale_user(np.nan_to_num(user_values, nan=0.0))
+
+        n_users, n_countries = len(user_scaled), len(country_scaled)
+        nn = np.empty((n_users, n_countries))
+        if n_countries:
+            chunk = max(1, MAX_PAIRS_PER_BATCH // n_countries)
+            for start in range(0, n_users, chunk):
+                X = layout.pair_matrix(user_scaled[start : start + chunk], country_scaled)
+                nn[start : start + chunk] = nn_model.predict(X).reshape(-1, n_countries)
+
+        baseline = baseline_score_matrix(self.user_frame, country_rows, self.scoring_plan)
+        final = self.alpha * baseline + (1.0 - self.alpha) * nn
+        return nn, baseline, final
+
+    def _rank(self, final_rows: np.ndarray) -> np.ndarray:
+        k = min(self.top_k, final_rows.shape[1])
+        return np.argsort(-final_rows, axis=1, kind="stable")[:, :k]
+
+    def score_all(self, nn_model: MLPRegressor) -> "BatchScoreStore":
+        """Score every user against the whole catalog (O(users x destinations))."""
+        self.nn_scores, self.baseline_scores, self.final_scores = self._score_columns(
+            self.country_df, nn_model
+        )
+        self.top_k_pos = self._rank(self.final_scores)
+        self.model_fingerprint = model_fingerprint(nn_model)
+        return self
+
+    def top_k_frame(self) -> pd.DataFrame:
+        """Long-format top-k lists: [user_id, rank, country_code, final_score]."""
+        rows = np.repeat(np.arange(len(self.user_ids)), self.top_k_pos.shape[1])
+        cols = self.top_k_pos.ravel()
+        return pd.DataFrame(
+            {
+                "user_id": self.user_ids[rows],
+                "rank": np.tile(np.arange(1, self.top_k_pos.shape[1] + 1), len(self.user_ids)),
+                "country_code": self.country_ids[cols],
+                "final_score": self.final_scores[rows, cols],
+            }
+        )
+
+    # ------------------------------------------------------------------
+    # Incremental updates
+    # ------------------------------------------------------------------
+
+    def apply_country_delta(
+        self, new_country_df: pd.DataFrame, nn_model: MLPRegressor
+    ) -> pd.DataFrame:
+        """
+        Bring the store in line with an updated catalog.
+
+        Destinations (matched on id_col) whose model / baseline columns
+        changed, or that are new, are re-scored for all users; removed
+        destinations are dropped. Cost is O(users x changed destinations),
+        plus a full-row re-rank only for users whose top-k can change.
+
+        Returns
+        -------
+        DataFrame
+            One row per (user, destination) that entered or left a top-k list:
+            [user_id, country_code, change, old_rank, new_rank], with change
+            "gained" or "lost" and ranks 1-based (NaN when outside the top-k).
+
+        Raises
+        ------
+        ValueError
+            If nn_model is not the model the store was scored with
+            (run score_all instead).
+        """
+        fingerprint = model_fingerprint(nn_model)
+        stored = getattr(self, "model_fingerprint", None)
+        if fingerprint != stored:
+            raise ValueError(
+                f"Store was scored with model {stored or 'unknown'}, got model "
+                f"{fingerprint}; a country delta would mix the two. "
+                "Re-score the whole store with score_all (CLI: build)."
+            )
+
+        id_col = self.id_col
+        old_ids = self.country_ids
+        old_top_ids = old_ids[self.top_k_pos]
+
+        new_country_df = new_country_df.reset_index(drop=True)
+        new_ids = new_country_df[id_col].to_numpy()
+
+        # Destinations whose scoring inputs changed, or that are new
+        compare_cols = list(
+            dict.fromkeys(
+                self.layout.country_cols
+                + list(self.scoring_plan.linear_columns)
+                + [country_col for _, country_col, _ in self.scoring_plan.budget_terms]
+            )
+        )
+        old_vals = (
+            self.country_df.set_index(id_col)
+            .reindex(index=new_ids, columns=compare_cols)
+            .apply(pd.to_numeric, errors="coerce")
+            .to_numpy(dtype=float)
+        )
+        new_vals = (
+            new_country_df.reindex(columns=compare_cols)
+            .apply(pd.to_numeric, errors="coerce")
+            .to_numpy(dtype=float)
+        )
+        same = (old_vals == new_vals) | (np.isnan(old_vals) & np.isnan(new_vals))
+        is_changed = ~same.all(axis=1) | ~np.isin(new_ids, old_ids)
+        changed_ids = new_ids[is_changed]
+
+        # Removed destinations
+        keep = np.isin(old_ids, new_ids)
+        self.nn_scores = self.nn_scores[:, keep]
+        self.baseline_scores = self.baseline_scores[:, keep]
+        self.final_scores = self.final_scores[:, keep]
+
+        # Re-score changed columns only, then append the new destinations
+        added_ids = new_ids[~np.isin(new_ids, old_ids)]
+        order = np.concatenate([old_ids[keep], added_ids])
+        self.country_df = (
+            new_country_df.set_index(id_col, drop=False).loc[order].reset_index(drop=True)
+        )
+        if len(added_ids):
+            pad = np.zeros((len(self.user_ids), len(added_ids)))
+            self.nn_scores = np.hstack([self.nn_scores, pad])
+            self.baseline_scores = np.hstack([self.baseline_scores, pad])
+            self.final_scores = np.hstack([self.final_scores, pad])
+
+        changed_pos = np.flatnonzero(np.isin(order, changed_ids))
+        if changed_pos.size:
+            nn, baseline, final = self._score_columns(
+                self.country_df.iloc[changed_pos], nn_model
+            )
+            self.nn_scores[:, changed_pos] = nn
+            self.baseline_scores[:, changed_pos] = baseline
+            self.final_scores[:, changed_pos] = final
+
+        # Users whose top-k can change: a changed or removed destination was
+        # in their list, or a changed destination now beats their k-th score.
+        old_top_pos = self._positions_of(old_top_ids)
+        k_now = min(self.top_k, len(order))
+        if old_top_pos.shape[1] != k_now:
+            touched = np.ones(len(self.user_ids), dtype=bool)
+        else:
+            touched = (old_top_pos < 0).any(axis=1) | np.isin(old_top_ids, changed_ids).any(axis=1)
+            if changed_pos.size and k_now:
+                kth = self.final_scores[np.arange(len(self.user_ids)), old_top_pos[:, -1]]
+                touched |= (self.final_scores[:, changed_pos] > kth[:, None]).any(axis=1)
+
+        users = np.flatnonzero(touched)
+        if old_top_pos.shape[1] == k_now:
+            self.top_k_pos = old_top_pos
+            self.top_k_pos[users] = self._rank(self.final_scores[users])
+        else:
+            self.top_k_pos = self._rank(self.final_scores)
+
+        return self._top_k_diff(old_top_ids, order[self.top_k_pos], users)
+
+    def _positions_of(self, top_ids: np.ndarray) -> np.ndarray:
+        """Map destination ids to current positions (-1 if removed)."""
+        pos_by_id = {cid: i for i, cid in enumerate(self.country_ids)}
+        return np.vectorize(lambda cid: pos_by_id.get(cid, -1), otypes=[int])(top_ids)
+
+    def _top_k_diff(
+        self, old_top_ids: np.ndarray, new_top_ids: np.ndarray, users: np.ndarray
+    ) -> pd.DataFrame:
+        records = []
+        for u in users:
+            old = list(old_top_ids[u])
+            new = list(new_top_ids[u])
+            for cid in old:
+                if cid not in new:
+                    records.append((self.user_ids[u], cid, "lost", old.index(cid) + 1, np.nan))
+            for cid in new:
+                if cid not in old:
+                    records.append((self.user_ids[u], cid, "gained", np.nan, new.index(cid) + 1))
+        return pd.DataFrame(
+            records, columns=["user_id", "country_code", "change", "old_rank", "new_rank"]
+        )
+
+    # ------------------------------------------------------------------
+    # Persistence
+    # ------------------------------------------------------------------
+
+    def save(self, path: Union[str, Path]) -> None:
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        joblib.dump(self, path)
+
+    @staticmethod
+    def load(path: Union[str, Path]) -> "BatchScoreStore":
+        path = Path(path)
+        if not path.exists():
+            raise FileNotFoundError(f"Batch score store not found at {path}")
+        return joblib.load(path)
+
+
+# --------------------------------------------------------------------------
+# CLI
+# --------------------------------------------------------------------------
+
+
+def main():
+    from .cli_demo import (
+        get_project_paths,
+        infer_country_feature_cols,
+        infer_user_feature_cols,
+    )
+    from .recommender import load_country_features, load_model_and_scaler
+    from ..utils.config_utils import load_scoring_config
+
+    paths = get_project_paths()
+
+    parser = argparse.ArgumentParser(description="Batch scoring store for all survey users")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    build = sub.add_parser("build", help="Score all users against the full catalog")
+    build.add_argument("--store", type=Path, required=True, help="Output store file")
+    build.add_argument("--top-k", type=int, default=5)
+    build.add_argument("--alpha", type=float, default=0.5)
+    build.add_argument(
+        "--country-file",
+        type=Path,
+        default=paths["external_dir"] / "country_features.csv",
+    )
+    build.add_argument(
+        "--scoring-config",
+        type=Path,
+        default=paths["config_dir"] / "scoring_weights.json",
+    )
+
+    delta = sub.add_parser("country-delta", help="Re-score changed destinations only")
+    delta.add_argument("--store", type=Path, required=True, help="Store file to update")
+    delta.add_argument("--country-file", type=Path, required=True, help="Updated catalog")
+    delta.add_argument("--diff-out", type=Path, default=None, help="Write the diff as CSV")
+
+    args = parser.parse_args()
+    scaler, nn_model = load_model_and_scaler(paths["model_dir"])
+
+    if args.command == "build":
+        user_file = paths["processed_dir"] / "final_model_dataset_with_clusters.csv"
+        if not user_file.exists():
+            user_file = paths["processed_dir"] / "final_model_dataset.csv"
+        user_df = pd.read_csv(user_file)
+        country_df = load_country_features(args.country_file)
+
+        store = BatchScoreStore(
+            user_df,
+            country_df,
+            infer_user_feature_cols(user_df),
+            infer_country_feature_cols(country_df),
+            scaler,
+            alpha=args.alpha,
+            top_k=args.top_k,
+            scoring_plan=load_scoring_config(args.scoring_config),
+        ).score_all(nn_model)
+        store.save(args.store)
+        print(
+            f"Scored {len(store.user_ids)} users x {len(store.country_df)} destinations "
+            f"(weights {store.weights_version}, model {store.model_fingerprint}) -> {args.store}"
+        )
+        return
+
+    store = BatchScoreStore.load(args.store)
+    try:
+        diff = store.apply_country_delta(load_country_features(args.country_file), nn_model)
+    except ValueError as exc:
+        raise SystemExit(f"error: {exc}")
+    store.save(args.store)
+
+    print(f"{diff['user_id'].nunique()} users changed top-{store.top_k}")
+    if len(diff):
+        print(diff.groupby(["country_code", "change"]).size().to_string())
+    if args.diff_out is not None:
+        diff.to_csv(args.diff_out, index=False)
+        print(f"Diff written to {args.diff_out}")
+
+
+if __name__ == "__main__":
+    main()
@@ -19,6 +19,7 @@ from .recommender import (
     load_model_and_scaler,
     recommend_destinations,
 )
+from ..utils.config_utils import load_scoring_config
 
 
 def get_project_paths() -> dict:
@@ -39,6 +40,8 @@ def get_project_paths() -> dict:
           data/
             external/
               country_features.csv
+          config/
+            scoring_weights.json
     """
     this_file = Path(__file__).resolve()
     project_root = this_file.parents[2]  # .../Re-settlement
@@ -46,6 +49,7 @@ def get_project_paths() -> dict:
     processed_dir = notebooks_dir / "processed"
     model_dir = processed_dir / "models"
     external_dir = project_root / "data" / "external"
+    config_dir = project_root / "config"
 
     return {
         "project_root": project_root,
@@ -53,6 +57,7 @@ def get_project_paths() -> dict:
         "processed_dir": processed_dir,
         "model_dir": model_dir,
         "external_dir": external_dir,
+        "config_dir": config_dir,
     }
 
 
@@ -124,6 +129,12 @@ def main():
         default=0.5,
         help="Weight between baseline and NN scores (0.0–1.0, default: 0.5)",
     )
+    parser.add_argument(
+        "--scoring-config",
+        type=Path,
+        default=paths["config_dir"] / "scoring_weights.json",
+        help="Baseline scoring weights config (default: config/scoring_weights.json)",
+    )
     args = parser.parse_args()
 
     # Load user features
@@ -148,6 +159,10 @@ def main():
     # Load model and scaler
     scaler, nn_model = load_model_and_scaler(model_dir)
 
+    # Load baseline scoring weights
+    scoring_plan = load_scoring_config(args.scoring_config)
+    print(f"Loaded scoring weights {scoring_plan.version} from: {args.scoring_config}")
+
     # Infer feature columns
     user_feature_cols = infer_user_feature_cols(user_df)
     country_feature_cols = infer_country_feature_cols(country_df)
@@ -176,6 +191,7 @@ def main():
         nn_model=nn_model,
         top_k=args.top_k,
         alpha=args.alpha,
+        scoring_plan=scoring_plan,
     )
 
     # Pretty print
@@ -0,0 +1,274 @@
+"""
+Counterfactual "what would change my ranking" search.
+
+Given a user and a target destination, this module evaluates a grid of
+edits to the fields a user can actually act on (budget, remote work,
+English, region preferences) and reports where the target would rank
+after each edit. The smallest edit that brings the target into the top-k
+answers questions such as "what budget would make Europe feasible?".
+
+All edits are scored in one batched (edits x destinations) pass through
+FastRecommender.score_many, so the whole grid costs about as much as a
+few single requests and can back a live panel in the app.
+
+Only fields the NN or the baseline actually reads are combined with
+each other and with budget changes. Any other actionable field (e.g.
+lang_english, when the model was trained without it) gets a single
+toggle that shows it does not change the ranking.
+"""
+
+from __future__ import annotations
+
+from itertools import combinations
+from typing import Any, Dict, List, Mapping, Optional, Sequence, Union
+
+import numpy as np
+import pandas as pd
+from sklearn.neural_network import MLPRegressor
+from sklearn.preprocessing import StandardScaler
+
+from .fast_path import FastRecommender
+from ..utils.config_utils import DEFAULT_SCORING_PLAN, ScoringPlan
+
+
+BUDGET_FIELD = "budget_estimated_usd"
+
+# Binary fields a user can change (region preferences are added from the
+# user dict / model columns, see actionable_binary_fields)
+BINARY_FIELDS = ["remote_capable", "lang_english"]
+
+# Budget grid as multiples of the current budget
+BUDGET_MULTIPLIERS = (1.25, 1.5, 2.0, 3.0, 4.0)
+
+RESULT_COLUMNS = [
+    "edit",
+    "n_changes",
+    BUDGET_FIELD,
+    "budget_change",
+    "target_rank",
+    "rank_change",
+    "in_top_k",
+    "target_final_score",
+    "used_in_scoring",
+    "changes",
+]
+
+
+def _field_value(user: Mapping[str, Any], field: str) -> float:
+    value = user.get(field)
+    if value is None or pd.isna(value):
+        return 0.0
+    return float(value)
+
+
+def actionable_binary_fields(
+    fast: FastRecommender, user: Mapping[str, Any]
+) -> List[str]:
+    """
+    Binary fields to toggle: remote_capable, lang_english and every pref_*
+    flag found in the user dict or among the model's user inputs.
+    """
+    prefs = {c for c in user if c.startswith("pref_")}
+    prefs |= {c for c in fast.user_feature_cols if c.startswith("pref_")}
+    return BINARY_FIELDS + sorted(prefs)
+
+
+def scored_user_fields(fast: FastRecommender, scoring_plan: Optional[ScoringPlan] = None) -> set:
+    """User fields that reach a score: NN inputs and the plan's budget terms."""
+    plan = scoring_plan or DEFAULT_SCORING_PLAN
+    return set(fast.layout.user_cols) | {user_col for user_col, _, _ in plan.budget_terms}
+
+
+def budget_grid(
+    fast: FastRecommender,
+    user: Mapping[str, Any],
+    target_pos: int,
+    scoring_plan: Optional[ScoringPlan] = None,
+    multipliers: Sequence[float] = BUDGET_MULTIPLIERS,
+) -> List[float]:
+    """
+    Candidate budgets: the current budget, the budget thresholds of the
+    target destination in the scoring plan and multiples of the current
+    budget. Only budgets at or above the current one are returned.
+    """
+    plan = scoring_plan or DEFAULT_SCORING_PLAN
+    current = _field_value(user, BUDGET_FIELD)
+    values = {current}
+    values.update(current * m for m in multipliers)
+
+    _, budget_terms = fast.baseline_parts(plan)
+    for user_col, required, missing, _, _ in budget_terms:
+        if user_col == BUDGET_FIELD and not missing[target_pos]:
+            values.add(float(required[target_pos]))
+
+    return sorted(v for v in values if v >= current)
+
+
+def _target_position(fast: FastRecommender, target: str) -> int:
+    for ids in (fast.country_ids, fast.country_names):
+        matches = np.flatnonzero(np.asarray(ids, dtype=object) == target)
+        if matches.size:
+            return int(matches[0])
+    raise ValueError(f"Unknown destination '{target}'")
+
+
+def _describe(changes: Mapping[str, Any], user: Mapping[str, Any]) -> str:
+    if not changes:
+        return "no change"
+    parts = []
+    for field, value in changes.items():
+        if field == BUDGET_FIELD:
+            parts.append(f"{field} {_field_value(user, field):g} -> {value:g}")
+        else:
+            parts.append(f"{field} {int(_field_value(user, field))} -> {int(value)}")
+    return ", ".join(parts)
+
+
+def counterfactual_edits(
+    fast: FastRecommender,
+    user: Mapping[str, Any],
+    target: str,
+    top_k: int = 5,
+    alpha: float = 0.5,
+    scoring_plan: Optional[ScoringPlan] = None,
+    budget_values: Optional[Sequence[float]] = None,
+    binary_fields: Optional[Sequence[str]] = None,
+    max_changes: int = 2,
+) -> pd.DataFrame:
+    """
+    Rank of a target destination under a grid of edits to the user profile.
+
+    Parameters
+    ----------
+    fast : FastRecommender
+        Compiled catalog, scaler and model.
+    user : dict-like
+        User features, e.g. the output of build_user_from_form.
+    target : str
+        Country code (or name) of the destination of interest.
+    top_k, alpha, scoring_plan
+        As in recommend_destinations.
+    budget_values : sequence of float, optional
+        Budgets to try. Defaults to budget_grid(...).
+    binary_fields : sequence of str, optional
+        Binary fields that may be toggled. Defaults to
+        actionable_binary_fields(...). Fields outside
+        scored_user_fields(...) are only toggled on their own (one edit
+        per field, used_in_scoring=False).
+    max_changes : int
+        Maximum number of binary fields toggled in one edit (a budget
+        change counts as one more change).
+
+    Returns
+    -------
+    DataFrame
+        One row per edit (including "no change"), with columns
+        RESULT_COLUMNS, sorted from the smallest edit to the largest:
+        by n_changes, then budget_change, then target_rank.
+    """
+    plan = scoring_plan or DEFAULT_SCORING_PLAN
+    target_pos = _target_position(fast, target)
+    if budget_values is None:
+        budget_values = budget_grid(fast, user, target_pos, plan)
+    if binary_fields is None:
+        binary_fields = actionable_binary_fields(fast, user)
+
+    current_budget = _field_value(user, BUDGET_FIELD)
+    budgets = [current_budget] + [float(b) for b in budget_values if float(b) != current_budget]
+
+    # Combining a field no score reads only repeats other rows
+    scored = scored_user_fields(fast, plan)
+    combinable = [f for f in binary_fields if f in scored]
+    unscored = [f for f in binary_fields if f not in scored]
+    toggles = [
+        combo
+        for n in range(min(max_changes, len(combinable)) + 1)
+        for combo in combinations(combinable, n)
+    ]
+
+    def toggle(field: str) -> int:
+        return 0 if _field_value(user, field) >= 0.5 else 1
+
+    edits: List[Dict[str, Any]] = []
+    for budget in budgets:
+        for combo in toggles:
+            changes: Dict[str, Any] = {}
+            if budget != current_budget:
+                changes[BUDGET_FIELD] = budget
+            for field in combo:
+                changes[field] = toggle(field)
+            edits.append(changes)
+    n_scored_edits = len(edits)
+    edits.extend({field: toggle(field)} for field in unscored)
+    users = [{**user, **changes} for changes in edits]
+
+    nn, baseline = fast.score_many(users, plan)
+    final = alpha * baseline + (1.0 - alpha) * nn
+
+    # Rank consistent with recommend's stable sort: strictly better
+    # destinations plus ties listed before the target
+    target_final = final[:, target_pos]
+    target_rank = (
+        (final > target_final[:, None]).sum(axis=1)
+        + (final[:, :target_pos] == target_final[:, None]).sum(axis=1)
+        + 1
+    )
+
+    used_in_scoring = np.arange(len(edits)) < n_scored_edits
+    result = pd.DataFrame(
+        {
+            "edit": [
+                _describe(c, user) + ("" if used else " (not used in scoring)")
+                for c, used in zip(edits, used_in_scoring)
+            ],
+            "n_changes": [len(c) for c in edits],
+            BUDGET_FIELD: [c.get(BUDGET_FIELD, current_budget) for c in edits],
+            "budget_change": [c.get(BUDGET_FIELD, current_budget) - current_budget for c in edits],
+            "target_rank": target_rank,
+            "rank_change": target_rank[0] - target_rank,
+            "in_top_k": target_rank <= top_k,
+            "target_final_score": target_final,
+            "used_in_scoring": used_in_scoring,
+            "changes": edits,
+        },
+        columns=RESULT_COLUMNS,
+    )
+
+    return result.sort_values(
+        ["n_changes", "budget_change", "target_rank"], kind="stable"
+    ).reset_index(drop=True)
+
+
+def smallest_edit_to_top_k(edits: pd.DataFrame) -> Optional[pd.Series]:
+    """
+    First row of counterfactual_edits(...) that puts the target in the
+    top-k ("no change" if it is already there), or None if no edit does.
+    """
+    hits = edits[edits["in_top_k"]]
+    if hits.empty:
+        return None
+    return hits.iloc[0]
+
+
+def recommend_counterfactuals(
+    user_features: Union[pd.Series, dict],
+    country_df: pd.DataFrame,
+    user_feature_cols: Sequence[str],
+    country_feature_cols: Sequence[str],
+    scaler: StandardScaler,
+    nn_model: MLPRegressor,
+    target: str,
+    top_k: int = 5,
+    alpha: float = 0.5,
+    id_col: str = "country_code",
+    **kwargs,
+) -> pd.DataFrame:
+    """
+    DataFrame-level entry point with the recommend_destinations signature.
+    Extra keyword arguments are forwarded to counterfactual_edits.
+    """
+    user = user_features if isinstance(user_features, dict) else user_features.to_dict()
+    fast = FastRecommender(
+        country_df, user_feature_cols, country_feature_cols, scaler, nn_model, id_col
+    )
+    return counterfactual_edits(fast, user, target, top_k=top_k, alpha=alpha, **kwargs)
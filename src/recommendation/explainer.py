@@ -0,0 +1,221 @@
+"""
+Explanations for the Sudanese relocation recommender.
+
+This module provides:
+- Rule-based, human readable explanation strings (generate_explanation)
+- Input gradients of the NN score, computed by backpropagating through
+  the MLP weights in NumPy (one forward + one backward pass per batch)
+- Per-feature attributions of the NN score (gradient x input or
+  integrated gradients) for a whole batch of (user, country) pairs
+- Top contributing user and country features per recommendation
+
+Attributions are measured relative to the "average training pair", i.e.
+the scaler mean, which is the origin of the scaled input space. For each
+pair the attributions therefore explain how far its nn_score is from the
+score of an average pair, and they are expressed in nn_score units.
+"""
+
+from __future__ import annotations
+
+from typing import List, Optional, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+from sklearn.neural_network import MLPRegressor
+
+from ..models.nn_model import (
+    ACTIVATION_DERIVATIVES,
+    layer_activation_names,
+    mlp_forward,
+)
+
+
+ATTRIBUTION_METHODS = ("gradient_x_input", "integrated_gradients")
+
+
+def generate_explanation(user_row: pd.Series, country_row: pd.Series) -> str:
+    """
+    Basic human readable explanation for a recommended destination.
+    Uses a few simple rules based on region, budget, culture, diaspora, safety.
+    """
+    parts: list[str] = []
+
+    region_group = country_row.get("region_group", "")
+    budget = user_row.get("budget_estimated_usd", None)
+    min_budget = country_row.get("min_budget_required", None)
+
+    # Region preferences flags (optional user features)
+    if region_group == "gulf" and user_row.get("pref_gulf", 0) == 1:
+        parts.append("matches your preference for Gulf countries")
+    if region_group == "east_africa" and user_row.get("pref_east_africa", 0) == 1:
+        parts.append("matches your preference for East Africa")
+    if region_group == "north_africa" and user_row.get("pref_north_africa", 0) == 1:
+        parts.append("matches your preference for North Africa")
+    if region_group == "europe" and user_row.get("pref_europe", 0) == 1:
+        parts.append("matches your preference for Europe")
+
+    # Cultural and language compatibility
+    cult_pref = user_row.get("cultural_preference", "")
+    if (
+        isinstance(cult_pref, str)
+        and "arabic" in cult_pref.lower()
+        and country_row.get("cultural_compatibility_score", 0) > 0.7
+    ):
+        parts.append("has strong Arabic and cultural similarity")
+
+    if user_row.get("lang_english", 0) == 1 and country_row.get(
+        "cultural_compatibility_score", 0
+    ) > 0.3:
+        parts.append("supports English or mixed language environments")
+
+    # Budget
+    if budget is not None and min_budget is not None:
+        try:
+            budget_val = float(budget)
+            min_budget_val = float(min_budget)
+            if budget_val >= min_budget_val:
+                parts.append("fits your stated monthly budget")
+            else:
+                parts.append("may be challenging given your budget")
+        except Exception:
+            pass
+
+    # Diaspora
+    if country_row.get("diaspora_presence_score", 0) >= 0.6:
+        parts.append("has a significant Sudanese community")
+
+    # Safety
+    if country_row.get("safety_index", 0) >= 0.7:
+        parts.append("offers relatively higher safety and stability")
+
+    if not parts:
+        return "Recommended based on overall fit with your preferences and constraints."
+
+    return "Recommended because " + ", ".join(parts) + "."
+
+
+def nn_input_gradients(
+    nn_model: MLPRegressor, X_scaled: np.ndarray
+) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Gradient of the NN score with respect to every (scaled) input feature.
+
+    Parameters
+    ----------
+    nn_model : MLPRegressor
+        Fitted neural network model with a single output.
+    X_scaled : ndarray of shape (n_rows, n_features)
+        Scaled model inputs.
+
+    Returns
+    -------
+    preds : ndarray of shape (n_rows,)
+        NN scores for each row.
+    grads : ndarray of shape (n_rows, n_features)
+        d nn_score / d X_scaled for each row.
+    """
+    preds, activations = mlp_forward(nn_model, X_scaled, return_activations=True)
+    act_names = layer_activation_names(nn_model)
+
+    # Output layer: d out / d pre-activation
+    delta = ACTIVATION_DERIVATIVES[act_names[-1]](activations[-1])
+
+    # Walk back through the layers; activations[i] is the input of layer i
+    for layer in range(len(nn_model.coefs_) - 1, -1, -1):
+        grad_in = delta @ nn_model.coefs_[layer].T
+        if layer == 0:
+            break
+        delta = grad_in * ACTIVATION_DERIVATIVES[act_names[layer - 1]](
+            activations[layer]
+        )
+
+    return preds, grad_in
+
+
+def nn_feature_attributions(
+    nn_model: MLPRegressor,
+    X_scaled: np.ndarray,
+    method: str = "gradient_x_input",
+    n_steps: int = 8,
+    baseline: Optional[np.ndarray] = None,
+) -> np.ndarray:
+    """
+    Per-feature contributions to the NN score for a batch of pairs.
+
+    Parameters
+    ----------
+    nn_model : MLPRegressor
+        Fitted neural network model.
+    X_scaled : ndarray of shape (n_rows, n_features)
+        Scaled model inputs.
+    method : str
+        "gradient_x_input" (one forward + backward pass) or
+        "integrated_gradients" (n_steps interpolation points, evaluated
+        together as a single batch).
+    n_steps : int
+        Number of interpolation points for integrated gradients.
+    baseline : ndarray of shape (n_features,), optional
+        Reference input. Defaults to zeros, i.e. the training mean.
+
+    Returns
+    -------
+    ndarray of shape (n_rows, n_features)
+        Contribution of each feature to each row's nn_score.
+    """
+    X_scaled = np.asarray(X_scaled, dtype=float)
+    if baseline is None:
+        baseline = np.zeros(X_scaled.shape[1])
+    delta_x = X_scaled - baseline
+
+    if method == "gradient_x_input":
+        _, grads = nn_input_gradients(nn_model, X_scaled)
+        return delta_x * grads
+
+    if method == "integrated_gradients":
+        if n_steps < 1:
+            raise ValueError("n_steps must be at least 1")
+        # Midpoint rule on the straight path baseline -> input, all steps stacked
+        steps = (np.arange(n_steps) + 0.5) / n_steps
+        X_path = baseline + steps[:, None, None] * delta_x[None, :, :]
+        _, grads = nn_input_gradients(nn_model, X_path.reshape(-1, X_scaled.shape[1]))
+        avg_grads = grads.reshape(n_steps, *X_scaled.shape).mean(axis=0)
+        return delta_x * avg_grads
+
+    raise ValueError(
+        f"Unknown attribution method '{method}', expected one of {ATTRIBUTION_METHODS}"
+    )
+
+
+def top_feature_contributions(
+    attributions: np.ndarray,
+    feature_names: Sequence[str],
+    user_feature_cols: Sequence[str],
+    top_n: int = 3,
+) -> Tuple[List[List[Tuple[str, float]]], List[List[Tuple[str, float]]]]:
+    """
+    Split attributions into user and country features and keep the
+    largest ones (by absolute value) for each row.
+
+    Returns
+    -------
+    top_user, top_country : list of lists of (feature_name, contribution)
+        One list per row, ordered from most to least influential.
+    """
+    feature_names = list(feature_names)
+    user_set = set(user_feature_cols)
+    user_idx = np.array([i for i, f in enumerate(feature_names) if f in user_set], dtype=int)
+    country_idx = np.array(
+        [i for i, f in enumerate(feature_names) if f not in user_set], dtype=int
+    )
+
+    def _top(idx: np.ndarray) -> List[List[Tuple[str, float]]]:
+        if idx.size == 0:
+            return [[] for _ in range(len(attributions))]
+        block = attributions[:, idx]
+        order = np.argsort(-np.abs(block), axis=1)[:, :top_n]
+        return [
+            [(feature_names[idx[j]], float(row[j])) for j in row_order]
+            for row, row_order in zip(block, order)
+        ]
+
+    return _top(user_idx), _top(country_idx)
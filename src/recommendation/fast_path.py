@@ -0,0 +1,523 @@
+"""
+Pandas-free single-request scoring for the Sudanese relocation recommender.
+
+recommend_destinations used to build several DataFrames per request (user
+Series, replicated user rows, concatenated pair frame, median-filled copy)
+to score a catalog of ~15 destinations. FastRecommender compiles the
+catalog once and then scores one user dict with a handful of NumPy calls:
+
+- destination features are median-filled, scaled and pushed through the
+  first NN layer once (the first layer is linear, so the user and
+  destination contributions can be added per request)
+- hidden activations are written into per-thread scratch buffers, so a
+  request allocates almost nothing
+- the baseline's destination-only terms are precomputed per scoring plan
+- results are compact Recommendation records instead of a DataFrame
+- a subset of the catalog (e.g. retrieved candidates) is scored by
+  slicing those precomputed arrays by row
+
+recommend_destinations is a thin wrapper around this module.
+
+Latency check (from project root):
+
+    python -m src.recommendation.fast_path --n-iter 2000
+
+Regression check against the original DataFrame pipeline
+(recommender.dataframe_pipeline_scores) for every survey respondent;
+exits with status 1 on a mismatch:
+
+    python -m src.recommendation.fast_path --check
+"""
+
+from __future__ import annotations
+
+import argparse
+import threading
+import time
+from typing import Any, Dict, List, Mapping, Optional, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+from sklearn.neural_network import MLPRegressor
+from sklearn.preprocessing import StandardScaler
+
+from .explainer import (
+    generate_explanation,
+    nn_feature_attributions,
+    top_feature_contributions,
+)
+from .scoring import PairFeatureLayout
+from ..models.nn_model import mlp_forward_from_first_layer
+from ..utils.config_utils import DEFAULT_SCORING_PLAN, ScoringPlan
+
+
+RESULT_COLUMNS = [
+    "country_code",
+    "country_name",
+    "nn_score",
+    "baseline_score",
+    "final_score",
+    "explanation",
+]
+ATTRIBUTION_COLUMNS = ["top_user_features", "top_country_features"]
+
+# Maximum number of (user, destination) pairs per NN batch in score_many
+MAX_PAIRS_PER_BATCH = 200_000
+
+
+class Recommendation:
+    """One recommended destination."""
+
+    __slots__ = (
+        "country_code",
+        "country_name",
+        "nn_score",
+        "baseline_score",
+        "final_score",
+        "explanation",
+        "weights_version",
+        "top_user_features",
+        "top_country_features",
+    )
+
+    def __init__(
+        self,
+        country_code: Any,
+        country_name: Any,
+        nn_score: float,
+        baseline_score: float,
+        final_score: float,
+        explanation: str,
+        weights_version: str,
+        top_user_features: Optional[List[Tuple[str, float]]] = None,
+        top_country_features: Optional[List[Tuple[str, float]]] = None,
+    ):
+        self.country_code = country_code
+        self.country_name = country_name
+        self.nn_score = nn_score
+        self.baseline_score = baseline_score
+        self.final_score = final_score
+        self.explanation = explanation
+        self.weights_version = weights_version
+        self.top_user_features = top_user_features
+        self.top_country_features = top_country_features
+
+    def as_dict(self) -> Dict[str, Any]:
+        return {name: getattr(self, name) for name in self.__slots__}
+
+    def __repr__(self) -> str:
+        return (
+            f"Recommendation({self.country_code!r}, final_score={self.final_score:.3f}, "
+            f"nn_score={self.nn_score:.3f}, baseline_score={self.baseline_score:.3f})"
+        )
+
+
+def _as_float(value: Any) -> float:
+    """float(value), with missing / non-numeric values mapped to 0."""
+    try:
+        value = float(value)
+    except (TypeError, ValueError):
+        return 0.0
+    return 0.0 if value != value else value
+
+
+class FastRecommender:
+    """
+    Destination catalog compiled for fast single-user scoring.
+
+    Parameters are the same as for recommend_destinations, plus
+    fill_values: values for missing destination features by column
+    (default: the median of country_df). Pass the full catalog's medians
+    when country_df is a subset of it, so scores match exhaustive
+    scoring. Missing or non-numeric user values are treated as 0, like
+    model columns that are absent from the input.
+
+    The scoring methods take optional `rows` (positions in country_df)
+    to score only those destinations, e.g. retrieval candidates.
+
+    Instances are safe to share between threads: per-request state lives
+    in per-thread scratch buffers.
+    """
+
+    def __init__(
+        self,
+        country_df: pd.DataFrame,
+        user_feature_cols: Sequence[str],
+        country_feature_cols: Sequence[str],
+        scaler: StandardScaler,
+        nn_model: MLPRegressor,
+        id_col: str = "country_code",
+        fill_values: Optional[Mapping[str, float]] = None,
+    ):
+        self.nn_model = nn_model
+        self.user_feature_cols = list(user_feature_cols)
+        self.layout = layout = PairFeatureLayout(
+            scaler, user_feature_cols, country_feature_cols, id_col
+        )
+        self.n_countries = len(country_df)
+
+        # Destination side of the first NN layer, computed once
+        country_values = (
+            country_df[layout.country_cols]
+            .apply(pd.to_numeric, errors="coerce")
+            .to_numpy(dtype=float)
+        )
+        if self.n_countries:
+            fill = np.nanmedian(country_values, axis=0)
+            if fill_values is not None:
+                fill = np.array(
+                    [fill_values.get(c, f) for c, f in zip(layout.country_cols, fill)],
+                    dtype=float,
+                )
+            country_values = np.where(np.isnan(country_values), fill, country_values)
+        self.country_values = country_values
+        self.country_scaled = layout.scale_country(country_values)
+
+        W1, b1 = nn_model.coefs_[0], nn_model.intercepts_[0]
+        other_idx = np.setdiff1d(
+            np.arange(layout.n_features), np.concatenate([layout.user_idx, layout.country_idx])
+        )
+        self.W1_user = W1[layout.user_idx]
+        self.W1_country = W1[layout.country_idx]
+        self.first_layer_country = (
+            self.country_scaled @ self.W1_country
+            + b1
+            + layout.fill_scaled[other_idx] @ W1[other_idx]
+        )
+        self.user_mean = layout.mean[layout.user_idx]
+        self.user_scale = layout.scale[layout.user_idx]
+
+        # Plain Python objects for the output records and explanations
+        country_id = country_df[id_col] if id_col in country_df.columns else country_df.index
+        country_name = (
+            country_df["country_name"] if "country_name" in country_df.columns else country_id
+        )
+        self.country_ids = list(country_id)
+        self.country_names = list(country_name)
+        self.country_rows = country_df.to_dict("records")
+
+        # The baseline only sees the model's destination columns, as before
+        numeric_country_cols = [c for c in country_feature_cols if c != id_col]
+        self.baseline_country_df = country_df[numeric_country_cols]
+        self._baseline_cache: Dict[str, tuple] = {}
+        self._baseline_lock = threading.Lock()
+        self._local = threading.local()
+
+    # ------------------------------------------------------------------
+    # Per-thread scratch buffers and per-plan baseline parts
+    # ------------------------------------------------------------------
+
+    def _scratch(self) -> List[np.ndarray]:
+        buffers = getattr(self._local, "buffers", None)
+        if buffers is None:
+            widths = [W.shape[1] for W in self.nn_model.coefs_]
+            buffers = [np.empty((self.n_countries, w)) for w in widths]
+            self._local.buffers = buffers
+        return buffers
+
+    def baseline_parts(self, plan: ScoringPlan) -> tuple:
+        parts = self._baseline_cache.get(plan.version)
+        if parts is None:
+            # A user without budget leaves only the destination-only terms
+            no_user = pd.DataFrame(index=[0])
+            static = plan.score_matrix(no_user, self.baseline_country_df)[0]
+            n_lin = len(plan.linear_columns)
+            budget_terms = []
+            for t, (user_col, country_col, threshold) in enumerate(plan.budget_terms):
+                if country_col in self.baseline_country_df.columns:
+                    required = pd.to_numeric(
+                        self.baseline_country_df[country_col], errors="coerce"
+                    ).to_numpy(dtype=float)
+                else:
+                    required = np.full(self.n_countries, np.nan)
+                w_above, w_below = plan.coefficients[n_lin + 2 * t : n_lin + 2 * t + 2]
+                budget_terms.append(
+                    (user_col, threshold * required, np.isnan(required), w_above, w_below)
+                )
+            parts = (static, budget_terms)
+            with self._baseline_lock:
+                self._baseline_cache[plan.version] = parts
+        return parts
+
+    # ------------------------------------------------------------------
+    # Scoring
+    # ------------------------------------------------------------------
+
+    def user_vector(self, user: Mapping[str, Any]) -> np.ndarray:
+        """Scaled model inputs coming from the user (len(layout.user_cols),)."""
+        raw = np.fromiter(
+            (_as_float(user.get(col, 0.0)) for col in self.layout.user_cols),
+            dtype=float,
+            count=len(self.layout.user_cols),
+        )
+        return (raw - self.user_mean) / self.user_scale
+
+    def nn_scores(
+        self, user: Mapping[str, Any], rows: Optional[np.ndarray] = None
+    ) -> np.ndarray:
+        """NN score of the user against every destination, or `rows` (a fresh array)."""
+        first_country = self.first_layer_country
+        buffers = self._scratch()
+        if rows is not None:
+            first_country = first_country[rows]
+            buffers = [b[: len(first_country)] for b in buffers]
+        first = buffers[0]
+        np.add(first_country, self.user_vector(user) @ self.W1_user, out=first)
+        return mlp_forward_from_first_layer(self.nn_model, first, buffers[1:]).copy()
+
+    def baseline_scores(
+        self,
+        user: Mapping[str, Any],
+        scoring_plan: Optional[ScoringPlan] = None,
+        rows: Optional[np.ndarray] = None,
+    ) -> np.ndarray:
+        """Baseline score of the user against every destination, or `rows`."""
+        static, budget_terms = self.baseline_parts(scoring_plan or DEFAULT_SCORING_PLAN)
+        scores = static.copy() if rows is None else static[rows]
+        for user_col, required, missing, w_above, w_below in budget_terms:
+            value = user.get(user_col, np.nan)
+            if value is None or pd.isna(value):
+                continue
+            if rows is not None:
+                required, missing = required[rows], missing[rows]
+            term = np.where(float(value) >= required, w_above, w_below)
+            term[missing] = 0.0
+            scores += term
+        return scores
+
+    def score_many(
+        self,
+        users: Sequence[Mapping[str, Any]],
+        scoring_plan: Optional[ScoringPlan] = None,
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        NN and baseline scores of several users against every destination,
+        in one batched pass (shared destination side of the first layer).
+
+        Returns
+        -------
+        nn, baseline : ndarray of shape (len(users), n_countries)
+        """
+        plan = scoring_plan or DEFAULT_SCORING_PLAN
+        n_users = len(users)
+        user_scaled = (
+            np.array(
+                [[_as_float(u.get(col, 0.0)) for col in self.layout.user_cols] for u in users],
+                dtype=float,
+            ).reshape(n_users, len(self.layout.user_cols))
+            - self.user_mean
+        ) / self.user_scale
+        first_user = user_scaled @ self.W1_user
+
+        nn = np.empty((n_users, self.n_countries))
+        chunk = max(1, MAX_PAIRS_PER_BATCH // max(self.n_countries, 1))
+        for start in range(0, n_users, chunk):
+            stop = min(start + chunk, n_users)
+            first = self.first_layer_country[None, :, :] + first_user[start:stop, None, :]
+            nn[start:stop] = mlp_forward_from_first_layer(
+                self.nn_model, first.reshape(-1, first.shape[-1])
+            ).reshape(stop - start, self.n_countries)
+
+        static, budget_terms = self.baseline_parts(plan)
+        baseline = np.tile(static, (n_users, 1))
+        for user_col, required, missing, w_above, w_below in budget_terms:
+            values = np.array(
+                [np.nan if u.get(user_col) is None else u.get(user_col) for u in users],
+                dtype=float,
+            )[:, None]
+            term = np.where(values >= required[None, :], w_above, w_below)
+            baseline += np.where(np.isnan(values) | missing[None, :], 0.0, term)
+
+        return nn, baseline
+
+    def recommend(
+        self,
+        user: Mapping[str, Any],
+        top_k: int = 5,
+        alpha: float = 0.5,
+        scoring_plan: Optional[ScoringPlan] = None,
+        feature_attributions: bool = False,
+        attribution_method: str = "gradient_x_input",
+        top_n_features: int = 3,
+        rows: Optional[np.ndarray] = None,
+    ) -> List[Recommendation]:
+        """
+        Top-k destinations for one user, best first.
+
+        Parameters
+        ----------
+        user : dict-like
+            User features, e.g. the output of build_user_from_form.
+        top_k, alpha, scoring_plan, feature_attributions, attribution_method,
+        top_n_features
+            As in recommend_destinations.
+        rows : array of int, optional
+            Only rank these destinations (positions in country_df).
+
+        Returns
+        -------
+        list[Recommendation]
+        """
+        plan = scoring_plan or DEFAULT_SCORING_PLAN
+
+        nn = self.nn_scores(user, rows)
+        baseline = self.baseline_scores(user, plan, rows)
+        final = alpha * baseline + (1.0 - alpha) * nn
+        order = np.argsort(-final, kind="stable")[:top_k]
+        # Positions in country_df for the output; order indexes the scores
+        positions = order if rows is None else np.asarray(rows)[order]
+
+        top_user = top_country = [None] * len(order)
+        if feature_attributions and len(order):
+            X_short = self.layout.pair_matrix(
+                self.user_vector(user)[None, :], self.country_scaled[positions]
+            )
+            attributions = nn_feature_attributions(
+                self.nn_model, X_short, method=attribution_method
+            )
+            top_user, top_country = top_feature_contributions(
+                attributions, self.layout.feature_names, self.user_feature_cols, top_n_features
+            )
+
+        return [
+            Recommendation(
+                self.country_ids[p],
+                self.country_names[p],
+                float(nn[i]),
+                float(baseline[i]),
+                float(final[i]),
+                generate_explanation(user, self.country_rows[p]),
+                plan.version,
+                top_user[j],
+                top_country[j],
+            )
+            for j, (i, p) in enumerate(zip(order, positions))
+        ]
+
+
+def recommendations_to_frame(
+    records: Sequence[Recommendation], feature_attributions: bool = False
+) -> pd.DataFrame:
+    """DataFrame view of Recommendation records (the recommend_destinations format)."""
+    columns = RESULT_COLUMNS + (ATTRIBUTION_COLUMNS if feature_attributions else [])
+    columns = columns + ["weights_version"]
+    return pd.DataFrame(
+        [[getattr(r, c) for c in columns] for r in records], columns=columns
+    )
+
+
+# --------------------------------------------------------------------------
+# Regression and latency checks
+# --------------------------------------------------------------------------
+
+
+def check_against_dataframe_pipeline(
+    fast: FastRecommender,
+    users: Sequence[Mapping[str, Any]],
+    country_df: pd.DataFrame,
+    user_feature_cols: Sequence[str],
+    country_feature_cols: Sequence[str],
+    scaler: StandardScaler,
+    nn_model: MLPRegressor,
+    top_k: int = 5,
+    alpha: float = 0.5,
+    id_col: str = "country_code",
+    scoring_plan: Optional[ScoringPlan] = None,
+) -> Dict[str, float]:
+    """
+    Compare FastRecommender with the original DataFrame pipeline.
+
+    Returns
+    -------
+    dict
+        Largest absolute nn / baseline / final score difference over all
+        users and destinations, and the number of users whose top-k
+        destinations (in order) differ.
+    """
+    from .recommender import dataframe_pipeline_scores
+
+    diffs = {"nn": 0.0, "baseline": 0.0, "final": 0.0}
+    n_top_k_mismatches = 0
+    for user in users:
+        ref_nn, ref_baseline, ref_final = dataframe_pipeline_scores(
+            pd.Series(user), country_df, user_feature_cols, country_feature_cols,
+            scaler, nn_model, alpha, id_col, scoring_plan,
+        )
+        nn = fast.nn_scores(user)
+        baseline = fast.baseline_scores(user, scoring_plan)
+        final = alpha * baseline + (1.0 - alpha) * nn
+        for name, ours, ref in (
+            ("nn", nn, ref_nn), ("baseline", baseline, ref_baseline), ("final", final, ref_final)
+        ):
+            diffs[name] = max(diffs[name], float(np.abs(ours - ref).max(initial=0.0)))
+
+        ref_top = np.argsort(-ref_final, kind="stable")[:top_k]
+        recs = fast.recommend(user, top_k=top_k, alpha=alpha, scoring_plan=scoring_plan)
+        top = [fast.country_ids.index(r.country_code) for r in recs]
+        n_top_k_mismatches += list(ref_top) != top
+
+    return {
+        "max_nn_diff": diffs["nn"],
+        "max_baseline_diff": diffs["baseline"],
+        "max_final_diff": diffs["final"],
+        "n_top_k_mismatches": n_top_k_mismatches,
+    }
+
+
+def main():
+    from .cli_demo import (
+        get_project_paths,
+        infer_country_feature_cols,
+        infer_user_feature_cols,
+    )
+    from .recommender import load_country_features, load_model_and_scaler
+
+    parser = argparse.ArgumentParser(description="Measure single-request latency")
+    parser.add_argument("--n-iter", type=int, default=2000)
+    parser.add_argument("--top-k", type=int, default=5)
+    parser.add_argument(
+        "--check",
+        action="store_true",
+        help="Compare scores with the original DataFrame pipeline instead",
+    )
+    parser.add_argument("--atol", type=float, default=1e-9, help="Tolerance for --check")
+    args = parser.parse_args()
+
+    paths = get_project_paths()
+    user_df = pd.read_csv(paths["processed_dir"] / "final_model_dataset.csv")
+    country_df = load_country_features(paths["external_dir"] / "country_features.csv")
+    scaler, nn_model = load_model_and_scaler(paths["model_dir"])
+
+    user_feature_cols = infer_user_feature_cols(user_df)
+    country_feature_cols = infer_country_feature_cols(country_df)
+    fast = FastRecommender(country_df, user_feature_cols, country_feature_cols, scaler, nn_model)
+    users = user_df.to_dict("records")
+
+    if args.check:
+        result = check_against_dataframe_pipeline(
+            fast, users, country_df, user_feature_cols, country_feature_cols,
+            scaler, nn_model, top_k=args.top_k,
+        )
+        for name, value in result.items():
+            print(f"{name}: {value:.3g}")
+        max_diff = max(v for k, v in result.items() if k.startswith("max_"))
+        if max_diff > args.atol or result["n_top_k_mismatches"]:
+            print(f"FAILED: fast path differs from the DataFrame pipeline ({len(users)} users)")
+            raise SystemExit(1)
+        print(f"OK: {len(users)} users match the DataFrame pipeline")
+        return
+
+    timings = np.empty(args.n_iter)
+    for i in range(args.n_iter):
+        user = users[i % len(users)]
+        start = time.perf_counter()
+        fast.recommend(user, top_k=args.top_k)
+        timings[i] = time.perf_counter() - start
+
+    p50, p99 = np.percentile(timings, [50, 99]) * 1e3
+    print(f"{len(country_df)} destinations, {args.n_iter} requests")
+    print(f"latency p50: {p50:.3f} ms   p99: {p99:.3f} ms")
+
+
+if __name__ == "__main__":
+    main()
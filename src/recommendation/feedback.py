@@ -0,0 +1,216 @@
+"""
+Append-only log of user feedback on recommended destinations.
+
+The app and any scoring service record what users do with a
+recommendation ("accept", "reject" or "click") as one JSON line per event.
+Each event keeps the user features, the destination and the scores that
+were shown, so the online updater (src/recommendation/online_update.py)
+can turn it into a training example later without re-running anything.
+
+Events are only ever appended. Readers keep a byte offset and read the
+lines after it, so several consumers can follow the same file. A line
+that is not valid JSON (e.g. an append cut short by a crash, merged with
+the next event) is logged and skipped, so it cannot block readers.
+
+Run `python -m src.recommendation.feedback --check` to verify that a
+corrupted line in the middle of a log is skipped.
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import logging
+import os
+import tempfile
+import threading
+import time
+from pathlib import Path
+from typing import Any, Dict, List, Mapping, Optional, Tuple, Union
+
+import numpy as np
+import pandas as pd
+
+
+logger = logging.getLogger(__name__)
+
+
+FEEDBACK_EVENTS = ("accept", "reject", "click")
+
+
+def _json_value(value: Any) -> Any:
+    """Plain JSON value for NumPy / pandas scalars (NaN becomes None)."""
+    if isinstance(value, np.generic):
+        value = value.item()
+    if isinstance(value, float) and np.isnan(value):
+        return None
+    return value
+
+
+class FeedbackLog:
+    """
+    Append-only JSON-lines event file.
+
+    Parameters
+    ----------
+    path : str or Path
+        Log file; created (with its directory) on the first append.
+    """
+
+    def __init__(self, path: Union[str, Path]):
+        self.path = Path(path)
+        self._lock = threading.Lock()
+
+    def __getstate__(self) -> Dict[str, Any]:
+        # The lock only guards this process; a copy sent elsewhere gets its own
+        return {"path": self.path}
+
+    def __setstate__(self, state: Dict[str, Any]) -> None:
+        self.__init__(state["path"])
+
+    def append(self, event: Mapping[str, Any]) -> None:
+        """Write one event as a single line (one write call per event)."""
+        line = json.dumps({k: _json_value(v) for k, v in event.items()}) + "\n"
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        with self._lock, open(self.path, "a", encoding="utf-8") as f:
+            f.write(line)
+            f.flush()
+            os.fsync(f.fileno())
+
+    def read_from(
+        self, offset: int = 0, max_events: Optional[int] = None, until: Optional[int] = None
+    ) -> Tuple[List[Dict[str, Any]], int]:
+        """
+        Events written after byte `offset` (and, if given, before byte
+        `until`).
+
+        A trailing line without newline (a write in progress) is left for
+        the next read. Lines that are not valid JSON are logged and
+        skipped.
+
+        Returns
+        -------
+        events : list of dict
+        new_offset : int
+            Offset to pass to the next call.
+        """
+        if not self.path.exists():
+            return [], offset
+        events: List[Dict[str, Any]] = []
+        with open(self.path, "rb") as f:
+            f.seek(offset)
+            for line in f:
+                if not line.endswith(b"\n") or (until is not None and offset >= until):
+                    break
+                start = offset
+                offset += len(line)
+                if not line.strip():
+                    continue
+                try:
+                    events.append(json.loads(line))
+                except ValueError:  # JSONDecodeError or invalid UTF-8
+                    logger.warning(
+                        "Skipping corrupted feedback line at byte %d of %s", start, self.path
+                    )
+                if max_events is not None and len(events) >= max_events:
+                    break
+        return events, offset
+
+
+def record_feedback(
+    log: FeedbackLog,
+    user_features: Union[pd.Series, Mapping[str, Any]],
+    recommendation: Union[pd.Series, Mapping[str, Any]],
+    event: str,
+    model_version: Optional[str] = None,
+    user_feature_cols: Optional[list] = None,
+) -> Dict[str, Any]:
+    """
+    Record one feedback event on a recommended destination.
+
+    Parameters
+    ----------
+    log : FeedbackLog
+    user_features : dict-like
+        Features the recommendation was computed from.
+    recommendation : dict-like
+        One row of recommend_destinations output (country_code,
+        nn_score, baseline_score, final_score, weights_version), or a
+        Recommendation.as_dict().
+    event : str
+        One of FEEDBACK_EVENTS.
+    model_version : str, optional
+        Version of the NN that produced nn_score.
+    user_feature_cols : list of str, optional
+        Only store these user fields (default: all of them).
+
+    Returns
+    -------
+    dict
+        The event as written.
+    """
+    if event not in FEEDBACK_EVENTS:
+        raise ValueError(f"Unknown feedback event '{event}', expected one of {FEEDBACK_EVENTS}")
+
+    user = dict(user_features)
+    if user_feature_cols is not None:
+        user = {c: user.get(c) for c in user_feature_cols}
+
+    record = {
+        "timestamp": time.time(),
+        "event": event,
+        "country_code": recommendation["country_code"],
+        "nn_score": float(recommendation["nn_score"]),
+        "baseline_score": float(recommendation["baseline_score"]),
+        "final_score": float(recommendation["final_score"]),
+        "weights_version": recommendation.get("weights_version"),
+        "model_version": model_version,
+        "user": {k: _json_value(v) for k, v in user.items()},
+    }
+    log.append(record)
+    return record
+
+
+# ----------------------------------------------------------------------
+# Self-check
+# ----------------------------------------------------------------------
+
+
+def check_corrupted_line_skipped() -> bool:
+    """
+    Write a log with an interrupted append in the middle and check that
+    read_from skips the merged line and keeps the events around it.
+    """
+    with tempfile.TemporaryDirectory() as tmp:
+        log = FeedbackLog(Path(tmp) / "events.jsonl")
+        log.append({"event": "accept", "n": 0})
+        with open(log.path, "a", encoding="utf-8") as f:
+            f.write('{"event": "reject", "n"')  # append cut short
+        log.append({"event": "click", "n": 1})  # merges with the partial line
+        log.append({"event": "accept", "n": 2})
+
+        events, offset = log.read_from(0)
+        ok = [e["n"] for e in events] == [0, 2] and offset == log.path.stat().st_size
+        # Reading on from the returned offset must not see anything again
+        ok = ok and log.read_from(offset) == ([], offset)
+    return ok
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Feedback log utilities")
+    parser.add_argument(
+        "--check",
+        action="store_true",
+        help="Check that a corrupted line in the middle of a log is skipped",
+    )
+    args = parser.parse_args()
+
+    if args.check:
+        if not check_corrupted_line_skipped():
+            print("FAILED: a corrupted line blocks FeedbackLog.read_from")
+            raise SystemExit(1)
+        print("OK: corrupted line skipped, surrounding events kept")
+
+
+if __name__ == "__main__":
+    main()
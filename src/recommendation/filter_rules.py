@@ -0,0 +1,87 @@
+"""
+Rule based eligibility filter (README, Step 1).
+
+Hard constraints that mark destinations as clearly infeasible for a user,
+evaluated for a whole batch of users against the catalog at once:
+
+- budget: the monthly budget is far below the destination's minimum
+  required budget
+- visa: the user only accepts easy visa processes and the destination's
+  visa policy for Sudanese passport holders is very restrictive
+
+A rule only applies when both the user value and the destination value
+are known; missing data never makes a destination ineligible.
+"""
+
+from __future__ import annotations
+
+from typing import Any, Dict, Mapping, Optional, Sequence
+
+import numpy as np
+import pandas as pd
+
+
+DEFAULT_ELIGIBILITY_RULES: Dict[str, Any] = {
+    # Budget must reach this fraction of min_budget_required
+    "min_budget_ratio": 0.5,
+    # Users who require an easy visa need at least this visa policy score
+    "easy_visa_min_score": 0.3,
+}
+
+BUDGET_COL = "budget_estimated_usd"
+EASY_VISA_COL = "visa_pref_Easy visa required"
+
+
+def _user_column(users: Sequence[Mapping[str, Any]], col: str) -> np.ndarray:
+    values = [np.nan if u.get(col) is None else u.get(col) for u in users]
+    return pd.to_numeric(pd.Series(values, dtype=object), errors="coerce").to_numpy(dtype=float)
+
+
+def _country_column(country_df: pd.DataFrame, col: str) -> np.ndarray:
+    if col not in country_df.columns:
+        return np.full(len(country_df), np.nan)
+    return pd.to_numeric(country_df[col], errors="coerce").to_numpy(dtype=float)
+
+
+def eligibility_mask(
+    users: Sequence[Mapping[str, Any]],
+    country_df: pd.DataFrame,
+    rules: Optional[Mapping[str, Any]] = None,
+) -> np.ndarray:
+    """
+    Which destinations pass the hard constraints, per user.
+
+    Parameters
+    ----------
+    users : sequence of dict-like
+        User features (e.g. rows of the model dataset or the output of
+        build_user_from_form).
+    country_df : DataFrame
+        Destination catalog with min_budget_required and
+        visa_policy_sudanese_score.
+    rules : mapping, optional
+        Rule thresholds, see DEFAULT_ELIGIBILITY_RULES. A rule set to None
+        is disabled.
+
+    Returns
+    -------
+    ndarray of bool, shape (len(users), len(country_df))
+        True where the destination is eligible for the user.
+    """
+    rules = {**DEFAULT_ELIGIBILITY_RULES, **(rules or {})}
+    eligible = np.ones((len(users), len(country_df)), dtype=bool)
+
+    ratio = rules.get("min_budget_ratio")
+    if ratio is not None:
+        budget = _user_column(users, BUDGET_COL)[:, None]
+        required = _country_column(country_df, "min_budget_required")[None, :]
+        # Comparisons with NaN are False, so missing data never excludes
+        eligible &= ~(budget < ratio * required)
+
+    min_visa = rules.get("easy_visa_min_score")
+    if min_visa is not None:
+        easy_only = _user_column(users, EASY_VISA_COL)[:, None] >= 0.5
+        visa = _country_column(country_df, "visa_policy_sudanese_score")[None, :]
+        eligible &= ~(easy_only & (visa < min_visa))
+
+    return eligible
@@ -0,0 +1,162 @@
+"""
+Household / group recommendations.
+
+Families relocating together need one ranking for several people. This
+module scores every member against the catalog in one batched pass
+(FastRecommender.score_many), applies the eligibility filter per member
+and aggregates the members' final scores into a group score:
+
+- "mean": average member score
+- "least_misery": score of the least satisfied member
+- "weighted": weighted average with caller supplied member weights
+
+A destination enters the joint ranking only if it is eligible for every
+member. The result keeps each member's score next to the group score.
+"""
+
+from __future__ import annotations
+
+from typing import Any, List, Mapping, Optional, Sequence, Union
+
+import numpy as np
+import pandas as pd
+from sklearn.neural_network import MLPRegressor
+from sklearn.preprocessing import StandardScaler
+
+from .fast_path import FastRecommender
+from .filter_rules import eligibility_mask
+from ..utils.config_utils import DEFAULT_SCORING_PLAN, ScoringPlan
+
+
+AGGREGATION_STRATEGIES = ("mean", "least_misery", "weighted")
+
+
+def aggregate_member_scores(
+    scores: np.ndarray,
+    strategy: str = "mean",
+    weights: Optional[Sequence[float]] = None,
+) -> np.ndarray:
+    """
+    Combine per-member scores into one group score per destination.
+
+    Parameters
+    ----------
+    scores : ndarray of shape (n_members, n_countries)
+    strategy : str
+        One of AGGREGATION_STRATEGIES.
+    weights : sequence of float, optional
+        Member weights for "weighted" (normalised to sum to 1).
+
+    Returns
+    -------
+    ndarray of shape (n_countries,)
+    """
+    if strategy == "mean":
+        return scores.mean(axis=0)
+    if strategy == "least_misery":
+        return scores.min(axis=0)
+    if strategy == "weighted":
+        if weights is None:
+            raise ValueError("weights are required for the 'weighted' strategy")
+        w = np.asarray(weights, dtype=float)
+        if w.shape != (scores.shape[0],) or np.any(w < 0) or w.sum() <= 0:
+            raise ValueError("weights must be one non-negative value per member, not all zero")
+        return (w / w.sum()) @ scores
+
+    raise ValueError(
+        f"Unknown aggregation strategy '{strategy}', expected one of {AGGREGATION_STRATEGIES}"
+    )
+
+
+def recommend_for_group(
+    fast: FastRecommender,
+    members: Sequence[Mapping[str, Any]],
+    top_k: int = 5,
+    alpha: float = 0.5,
+    strategy: str = "mean",
+    weights: Optional[Sequence[float]] = None,
+    member_ids: Optional[Sequence[str]] = None,
+    scoring_plan: Optional[ScoringPlan] = None,
+    eligibility_rules: Optional[Mapping[str, Any]] = None,
+) -> pd.DataFrame:
+    """
+    Joint top-k destinations for a group of users.
+
+    Parameters
+    ----------
+    fast : FastRecommender
+        Compiled catalog, scaler and model.
+    members : sequence of dict-like
+        One feature dict per member (e.g. build_user_from_form output).
+    top_k, alpha, scoring_plan
+        As in recommend_destinations.
+    strategy, weights
+        Aggregation of member scores, see aggregate_member_scores.
+    member_ids : sequence of str, optional
+        Labels used in the breakdown columns. Defaults to
+        member_1, member_2, ...
+    eligibility_rules : mapping, optional
+        Thresholds for filter_rules.eligibility_mask.
+
+    Returns
+    -------
+    DataFrame
+        Up to top_k rows sorted by group_score, with columns
+        [country_code, country_name, group_score, <member>_final_score,
+        <member>_nn_score, <member>_baseline_score for each member,
+        weights_version].
+    """
+    if not members:
+        raise ValueError("members must contain at least one profile")
+    plan = scoring_plan or DEFAULT_SCORING_PLAN
+    if member_ids is None:
+        member_ids = [f"member_{i + 1}" for i in range(len(members))]
+    if len(member_ids) != len(members):
+        raise ValueError("member_ids must have one label per member")
+
+    nn, baseline = fast.score_many(members, plan)
+    final = alpha * baseline + (1.0 - alpha) * nn
+    group_score = aggregate_member_scores(final, strategy, weights)
+
+    eligible = eligibility_mask(members, fast.baseline_country_df, eligibility_rules).all(axis=0)
+    candidates = np.flatnonzero(eligible)
+    order = candidates[np.argsort(-group_score[candidates], kind="stable")][:top_k]
+
+    result = pd.DataFrame(
+        {
+            "country_code": [fast.country_ids[i] for i in order],
+            "country_name": [fast.country_names[i] for i in order],
+            "group_score": group_score[order],
+        }
+    )
+    for m, member in enumerate(member_ids):
+        result[f"{member}_final_score"] = final[m, order]
+        result[f"{member}_nn_score"] = nn[m, order]
+        result[f"{member}_baseline_score"] = baseline[m, order]
+    result["weights_version"] = plan.version
+    return result
+
+
+def recommend_destinations_group(
+    members: Union[pd.DataFrame, Sequence[Mapping[str, Any]]],
+    country_df: pd.DataFrame,
+    user_feature_cols: Sequence[str],
+    country_feature_cols: Sequence[str],
+    scaler: StandardScaler,
+    nn_model: MLPRegressor,
+    top_k: int = 5,
+    alpha: float = 0.5,
+    id_col: str = "country_code",
+    **kwargs,
+) -> pd.DataFrame:
+    """
+    DataFrame-level entry point with the recommend_destinations signature.
+    `members` is a DataFrame (one row per member) or a list of dicts;
+    extra keyword arguments are forwarded to recommend_for_group.
+    """
+    if isinstance(members, pd.DataFrame):
+        members: List[Mapping[str, Any]] = members.to_dict("records")
+    fast = FastRecommender(
+        country_df, user_feature_cols, country_feature_cols, scaler, nn_model, id_col
+    )
+    return recommend_for_group(fast, members, top_k=top_k, alpha=alpha, **kwargs)
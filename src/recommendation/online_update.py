@@ -0,0 +1,595 @@
+"""
+Online updates of the NN from user feedback.
+
+Until now the only way to improve the network was a full offline retrain
+over all (user, destination) pairs. This module keeps the served model
+fresh from the feedback log instead:
+
+- ModelStore holds the served (model, version) pair. Requests read it
+  once and keep that object, and a promotion swaps it in a single
+  reference assignment (like ScoringConfigWatcher does for weights). The
+  promoted model is also written atomically next to the base model, so
+  a restarted app picks it up.
+- OnlineUpdater consumes new feedback events in mini-batches. Each batch
+  becomes regression targets (the nn_score that was shown, moved up for
+  accept / click and down for reject) and is applied with partial_fit to
+  a shadow copy of the served model, mixed with a sample of proxy-labelled
+  pairs (rehearsal) so the copy does not forget the offline behaviour.
+  The copy is then validated and promoted only if it passes. Events of a
+  rejected batch are not trained on again; they are appended to a
+  separate log of dropped events.
+
+With start(), reading the log, partial_fit, validation and saving all
+run in a separate worker process. The serving process only swaps in the
+returned model, so request latency does not depend on updates.
+
+Validation has two parts:
+
+- Proxy-label regression guard: proxy-labelled pairs of a sample of
+  survey respondents. The offline model was trained on all respondents,
+  so this is not a holdout; it only checks that the copy still agrees
+  with the proxy labels. Its RMSE may exceed the offline model's by at
+  most max_proxy_rmse_increase, so successive promotions cannot drift
+  further and further away.
+- Feedback holdout: a share of the feedback events that is never
+  trained on. The copy must fit them at least as well as the served
+  model. Which events are held out is a hash of the event, so the
+  feedback holdout is rebuilt from the log after a restart.
+"""
+
+from __future__ import annotations
+
+import copy
+import hashlib
+import json
+import logging
+import multiprocessing
+import os
+import tempfile
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Sequence, Tuple, Union
+
+import joblib
+import numpy as np
+import pandas as pd
+from sklearn.neural_network import MLPRegressor
+from sklearn.preprocessing import StandardScaler
+
+from .feedback import FeedbackLog
+from .scoring import PairFeatureLayout
+from ..models.model_utils import build_training_pairs
+from ..models.nn_model import mlp_forward
+from ..utils.config_utils import ScoringPlan
+
+
+logger = logging.getLogger(__name__)
+
+
+# Target = shown nn_score + shift (nn_score units)
+FEEDBACK_TARGET_SHIFTS: Dict[str, float] = {
+    "accept": 1.0,
+    "click": 0.25,
+    "reject": -1.0,
+}
+
+ONLINE_MODEL_NAME = "nn_model_online.joblib"
+
+# Most recent held out feedback examples kept for validation. Kept short:
+# targets follow the scores shown at the time, so old events go stale and
+# a long window ends up rejecting every update.
+MAX_FEEDBACK_HOLDOUT = 64
+
+# Proxy-labelled rehearsal pairs per trained feedback event (capped at the
+# number of rehearsal pairs). The labels' spread is ~30x the offline RMSE,
+# so feedback has to be diluted strongly to stay within the proxy guard.
+REHEARSAL_RATIO = 32.0
+
+
+# ----------------------------------------------------------------------
+# Served model
+# ----------------------------------------------------------------------
+
+
+def save_online_model(path: Path, model: MLPRegressor, version: str) -> None:
+    """Write {"model", "version"} to `path` atomically (temp file + rename)."""
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    fd, tmp = tempfile.mkstemp(dir=path.parent, suffix=".tmp")
+    os.close(fd)
+    try:
+        joblib.dump({"model": model, "version": version}, tmp)
+        os.replace(tmp, path)
+    finally:
+        if os.path.exists(tmp):
+            os.remove(tmp)
+
+
+class ModelStore:
+    """
+    The NN model currently served, with its version.
+
+    Serves `online_name` from model_dir if an online update was promoted
+    before, otherwise the offline `model_name`. The offline model is
+    always loaded as `offline_model`, the reference for validation.
+
+    Parameters
+    ----------
+    model_dir : str or Path
+        Directory of nn_scaler.joblib / nn_model.joblib.
+    """
+
+    def __init__(
+        self,
+        model_dir: Union[str, Path],
+        scaler_name: str = "nn_scaler.joblib",
+        model_name: str = "nn_model.joblib",
+        online_name: str = ONLINE_MODEL_NAME,
+    ):
+        self.model_dir = Path(model_dir)
+        self.online_path = self.model_dir / online_name
+        self.scaler: StandardScaler = joblib.load(self.model_dir / scaler_name)
+
+        self.offline_model: MLPRegressor = joblib.load(self.model_dir / model_name)
+        if self.online_path.exists():
+            saved = joblib.load(self.online_path)
+            self._current: Tuple[MLPRegressor, str] = (saved["model"], saved["version"])
+        else:
+            self._current = (self.offline_model, "offline")
+
+    @property
+    def current(self) -> Tuple[MLPRegressor, str]:
+        """(model, version) snapshot; read once per request."""
+        return self._current
+
+    @property
+    def model(self) -> MLPRegressor:
+        return self._current[0]
+
+    @property
+    def version(self) -> str:
+        return self._current[1]
+
+    def promote(self, model: MLPRegressor, version: str, persist: bool = True) -> None:
+        """Make `model` the served model (saving it first unless persist=False)."""
+        if persist:
+            save_online_model(self.online_path, model, version)
+        self._current = (model, version)
+
+
+def proxy_pairs(
+    user_df: pd.DataFrame,
+    country_df: pd.DataFrame,
+    scaler: StandardScaler,
+    n_guard_users: int = 16,
+    n_rehearsal_users: int = 64,
+    scoring_plan: Optional[ScoringPlan] = None,
+    random_state: Optional[int] = 42,
+) -> Tuple[Tuple[np.ndarray, np.ndarray], Tuple[np.ndarray, np.ndarray]]:
+    """
+    Scaled proxy-labelled pairs of two disjoint random sets of
+    respondents: one for the proxy-label regression guard, one for
+    rehearsal during updates.
+
+    The offline model was trained on every respondent, so the guard pairs
+    measure agreement with the proxy labels, not generalisation.
+
+    Returns
+    -------
+    guard : (X_scaled, y)
+        Pairs of n_guard_users respondents.
+    rehearsal : (X_scaled, y)
+        Pairs of up to n_rehearsal_users other respondents.
+    """
+    shuffled = user_df.sample(frac=1.0, random_state=random_state)
+    samples = (
+        shuffled.iloc[:n_guard_users],
+        shuffled.iloc[n_guard_users:n_guard_users + n_rehearsal_users],
+    )
+    pairs = []
+    for sample in samples:
+        X, y, _ = build_training_pairs(sample, country_df, scoring_plan=scoring_plan)
+        pairs.append((scaler.transform(X[list(scaler.feature_names_in_)]), y))
+    return pairs[0], pairs[1]
+
+
+def _mse(model: MLPRegressor, X: np.ndarray, y: np.ndarray) -> float:
+    return float(np.mean((mlp_forward(model, X) - y) ** 2))
+
+
+# ----------------------------------------------------------------------
+# Update work (runs in the worker process after OnlineUpdater.start())
+# ----------------------------------------------------------------------
+
+
+class FeedbackBatcher:
+    """
+    Everything one update needs besides the served model: event log,
+    pair feature encoding, validation data and thresholds. Picklable, so it
+    can be sent once to the worker process.
+
+    See OnlineUpdater for the parameters.
+    """
+
+    def __init__(
+        self,
+        log_path: Path,
+        online_path: Path,
+        scaler: StandardScaler,
+        country_df: pd.DataFrame,
+        user_feature_cols: Sequence[str],
+        country_feature_cols: Sequence[str],
+        proxy_guard: Tuple[np.ndarray, np.ndarray],
+        offline_proxy_rmse: float,
+        rehearsal: Optional[Tuple[np.ndarray, np.ndarray]],
+        rehearsal_ratio: float,
+        dropped_path: Path,
+        id_col: str,
+        batch_size: int,
+        feedback_holdout_fraction: float,
+        max_proxy_rmse_increase: float,
+    ):
+        self.log = FeedbackLog(log_path)
+        self.dropped_log = FeedbackLog(dropped_path)
+        self.online_path = Path(online_path)
+        self.layout = PairFeatureLayout(scaler, user_feature_cols, country_feature_cols, id_col)
+        self.guard_X, self.guard_y = proxy_guard
+        self.offline_proxy_rmse = offline_proxy_rmse
+        if rehearsal is None:
+            rehearsal = (np.empty((0, self.layout.n_features)), np.empty(0))
+        self.rehearsal_X, self.rehearsal_y = rehearsal
+        self.rehearsal_ratio = rehearsal_ratio
+        self.batch_size = batch_size
+        self.feedback_holdout_fraction = feedback_holdout_fraction
+        self.max_proxy_rmse_increase = max_proxy_rmse_increase
+
+        country_values = (
+            country_df[self.layout.country_cols]
+            .apply(pd.to_numeric, errors="coerce")
+            .to_numpy(dtype=float)
+        )
+        country_values = np.where(
+            np.isnan(country_values), np.nanmedian(country_values, axis=0), country_values
+        )
+        self.country_scaled = self.layout.scale_country(country_values)
+        country_id = country_df[id_col] if id_col in country_df.columns else country_df.index
+        self.country_pos = {code: i for i, code in enumerate(country_id)}
+
+        self.feedback_X = np.empty((0, self.layout.n_features))
+        self.feedback_y = np.empty(0)
+
+    def is_holdout_event(self, event: Dict[str, Any]) -> bool:
+        """Stable split: an event is held out (or not) on every read of the log."""
+        digest = hashlib.sha1(json.dumps(event, sort_keys=True).encode("utf-8")).digest()
+        return int.from_bytes(digest[:8], "big") / 2.0**64 < self.feedback_holdout_fraction
+
+    def add_feedback_holdout(self, events: Sequence[Dict[str, Any]]) -> None:
+        """Append held out events, keeping the most recent MAX_FEEDBACK_HOLDOUT."""
+        X, y = self.event_examples(events)
+        self.feedback_X = np.vstack([self.feedback_X, X])[-MAX_FEEDBACK_HOLDOUT:]
+        self.feedback_y = np.concatenate([self.feedback_y, y])[-MAX_FEEDBACK_HOLDOUT:]
+
+    def rebuild_feedback_holdout(self, offset: int, chunk_size: int = 10_000) -> None:
+        """Rebuild the feedback holdout from the events before byte `offset`."""
+        self.feedback_X = np.empty((0, self.layout.n_features))
+        self.feedback_y = np.empty(0)
+        position = 0
+        while position < offset:
+            events, position = self.log.read_from(position, max_events=chunk_size, until=offset)
+            if not events:
+                break
+            self.add_feedback_holdout([e for e in events if self.is_holdout_event(e)])
+
+    def event_examples(self, events: Sequence[Dict[str, Any]]) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Scaled model inputs and targets of feedback events. Events with an
+        unknown destination or event type are dropped.
+        """
+        events = [
+            e for e in events
+            if e.get("country_code") in self.country_pos and e.get("event") in FEEDBACK_TARGET_SHIFTS
+        ]
+        X = np.tile(self.layout.fill_scaled, (len(events), 1))
+        if not events:
+            return X, np.empty(0)
+
+        users = pd.DataFrame([e.get("user") or {} for e in events])
+        user_values = (
+            users.reindex(columns=self.layout.user_cols)
+            .apply(pd.to_numeric, errors="coerce")
+            .fillna(0.0)
+            .to_numpy(dtype=float)
+        )
+        X[:, self.layout.user_idx] = self.layout.scale_user(user_values)
+        X[:, self.layout.country_idx] = self.country_scaled[
+            [self.country_pos[e["country_code"]] for e in events]
+        ]
+        y = np.array([e["nn_score"] + FEEDBACK_TARGET_SHIFTS[e["event"]] for e in events])
+        return X, y
+
+    def rehearsal_sample(self, n_train: int, seed: int) -> Tuple[np.ndarray, np.ndarray]:
+        """rehearsal_ratio proxy-labelled pairs per feedback example."""
+        n = min(int(np.ceil(self.rehearsal_ratio * n_train)), len(self.rehearsal_y))
+        idx = np.random.default_rng(seed).choice(len(self.rehearsal_y), size=n, replace=False)
+        return self.rehearsal_X[idx], self.rehearsal_y[idx]
+
+    def run_batch(
+        self, served: MLPRegressor, offset: int, flush: bool, version: str
+    ) -> Tuple[Optional[MLPRegressor], Optional[Dict[str, Any]], int]:
+        """
+        Read up to batch_size events after `offset`, train and validate a
+        copy of `served`, and save it as `version` if it passes. The
+        training events of a batch that fails are appended to the log of
+        dropped events.
+
+        Returns
+        -------
+        shadow : MLPRegressor or None
+            The promoted copy, None if it failed or nothing was trained.
+        summary : dict or None
+            None if there was no (full) batch to consume.
+        new_offset : int
+        """
+        events, new_offset = self.log.read_from(offset, max_events=self.batch_size)
+        if not events or (len(events) < self.batch_size and not flush):
+            return None, None, offset
+
+        is_holdout = [self.is_holdout_event(e) for e in events]
+        self.add_feedback_holdout([e for e, held in zip(events, is_holdout) if held])
+        train_events = [e for e, held in zip(events, is_holdout) if not held]
+        X_train, y_train = self.event_examples(train_events)
+
+        summary: Dict[str, Any] = {"n_events": len(events), "n_train": len(y_train), "passed": False}
+        if not len(y_train):
+            return None, summary, new_offset
+
+        # Train a copy; the served model is never modified in place.
+        # Seeded by the offset, so a batch always gets the same rehearsal.
+        X_rehearsal, y_rehearsal = self.rehearsal_sample(len(y_train), seed=offset)
+        shadow = copy.deepcopy(served)
+        shadow.partial_fit(
+            np.vstack([X_train, X_rehearsal]), np.concatenate([y_train, y_rehearsal])
+        )
+        summary["n_rehearsal"] = len(y_rehearsal)
+
+        # Bounded by the offline model, so the limit does not compound
+        old_rmse = np.sqrt(_mse(served, self.guard_X, self.guard_y))
+        new_rmse = np.sqrt(_mse(shadow, self.guard_X, self.guard_y))
+        passed = new_rmse <= self.offline_proxy_rmse * (1.0 + self.max_proxy_rmse_increase)
+        summary.update(
+            proxy_rmse_offline=self.offline_proxy_rmse,
+            proxy_rmse_old=float(old_rmse),
+            proxy_rmse_new=float(new_rmse),
+        )
+
+        if len(self.feedback_y):
+            old_fb = _mse(served, self.feedback_X, self.feedback_y)
+            new_fb = _mse(shadow, self.feedback_X, self.feedback_y)
+            passed = passed and new_fb <= old_fb
+            summary.update(feedback_mse_old=old_fb, feedback_mse_new=new_fb)
+
+        summary["passed"] = bool(passed)
+        if not passed:
+            for event in train_events:
+                self.dropped_log.append(event)
+            summary["n_dropped"] = len(train_events)
+            return None, summary, new_offset
+        save_online_model(self.online_path, shadow, version)
+        return shadow, summary, new_offset
+
+
+_worker_batcher: Optional[FeedbackBatcher] = None
+
+
+def _init_worker(batcher: FeedbackBatcher) -> None:
+    global _worker_batcher
+    _worker_batcher = batcher
+    # Updates are never urgent; leave the CPU to request handling first
+    if hasattr(os, "nice"):
+        os.nice(10)
+
+
+def _worker_run_batch(served: MLPRegressor, offset: int, flush: bool, version: str):
+    return _worker_batcher.run_batch(served, offset, flush, version)
+
+
+# ----------------------------------------------------------------------
+# Updater
+# ----------------------------------------------------------------------
+
+
+class OnlineUpdater:
+    """
+    Apply feedback events to a shadow copy of the served model and
+    promote it when it passes validation.
+
+    Parameters
+    ----------
+    log : FeedbackLog
+        Event source.
+    store : ModelStore
+        Served model; receives promotions.
+    country_df : DataFrame
+        Destination catalog (to rebuild the pair features of an event).
+    user_feature_cols, country_feature_cols, id_col
+        As in recommend_destinations.
+    proxy_guard : (X_scaled, y)
+        Proxy-labelled pairs for the regression guard, e.g. the first
+        result of proxy_pairs.
+    rehearsal : (X_scaled, y), optional
+        Proxy-labelled pairs mixed into every update, e.g. the second
+        result of proxy_pairs. Without it, updates train on feedback only.
+    batch_size : int
+        Events per update; fewer pending events wait for the next poll.
+    rehearsal_ratio : float
+        Rehearsal pairs per trained feedback event.
+    feedback_holdout_fraction : float
+        Share of events kept for validation instead of training.
+    max_proxy_rmse_increase : float
+        Allowed relative increase of the proxy-guard RMSE over the
+        offline model's.
+    poll_interval : float
+        Seconds between checks of the log in the background thread.
+    state_path : str or Path, optional
+        Where the consumed log offset is saved (default: log path +
+        ".offset"), so a restart does not replay old events. The feedback
+        holdout is rebuilt from the events before that offset.
+    dropped_path : str or Path, optional
+        Log for the training events of rejected batches (default: log
+        path with a ".dropped" suffix before the extension).
+    """
+
+    def __init__(
+        self,
+        log: FeedbackLog,
+        store: ModelStore,
+        country_df: pd.DataFrame,
+        user_feature_cols: Sequence[str],
+        country_feature_cols: Sequence[str],
+        proxy_guard: Tuple[np.ndarray, np.ndarray],
+        rehearsal: Optional[Tuple[np.ndarray, np.ndarray]] = None,
+        id_col: str = "country_code",
+        batch_size: int = 32,
+        rehearsal_ratio: float = REHEARSAL_RATIO,
+        feedback_holdout_fraction: float = 0.2,
+        max_proxy_rmse_increase: float = 0.25,
+        poll_interval: float = 5.0,
+        state_path: Optional[Union[str, Path]] = None,
+        dropped_path: Optional[Union[str, Path]] = None,
+    ):
+        self.log = log
+        self.store = store
+        self.poll_interval = poll_interval
+        if dropped_path is None:
+            dropped_path = log.path.with_suffix(".dropped" + log.path.suffix)
+        self.batcher = FeedbackBatcher(
+            log.path,
+            store.online_path,
+            store.scaler,
+            country_df,
+            user_feature_cols,
+            country_feature_cols,
+            proxy_guard,
+            float(np.sqrt(_mse(store.offline_model, *proxy_guard))),
+            rehearsal,
+            rehearsal_ratio,
+            Path(dropped_path),
+            id_col,
+            batch_size,
+            feedback_holdout_fraction,
+            max_proxy_rmse_increase,
+        )
+        self.history: List[Dict[str, Any]] = []
+
+        self.state_path = Path(state_path) if state_path else Path(str(log.path) + ".offset")
+        self.offset = self._load_offset()
+        self.batcher.rebuild_feedback_holdout(self.offset)
+
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._executor: Optional[ProcessPoolExecutor] = None
+
+    def _load_offset(self) -> int:
+        try:
+            return int(json.loads(self.state_path.read_text())["offset"])
+        except (FileNotFoundError, KeyError, ValueError):
+            return 0
+
+    def _save_offset(self) -> None:
+        tmp = self.state_path.with_name(self.state_path.name + ".tmp")
+        tmp.write_text(json.dumps({"offset": self.offset}))
+        os.replace(tmp, self.state_path)
+
+    def step(self, flush: bool = False) -> Optional[Dict[str, Any]]:
+        """
+        Consume one mini-batch of new events, if there is one.
+
+        Runs in the worker process once start() was called, in the
+        calling thread otherwise.
+
+        Parameters
+        ----------
+        flush : bool
+            Also process a batch smaller than batch_size.
+
+        Returns
+        -------
+        dict or None
+            Summary of the update (also appended to `history`), None if
+            nothing was consumed.
+        """
+        with self._lock:
+            served, served_version = self.store.current
+            version = f"online-{time.strftime('%Y%m%dT%H%M%S', time.gmtime())}-{len(self.history)}"
+            if self._executor is not None:
+                future = self._executor.submit(
+                    _worker_run_batch, served, self.offset, flush, version
+                )
+                shadow, summary, new_offset = future.result()
+            else:
+                shadow, summary, new_offset = self.batcher.run_batch(
+                    served, self.offset, flush, version
+                )
+            if summary is None:
+                return None
+
+            summary.update(base_version=served_version, promoted=shadow is not None)
+            if shadow is not None:
+                # Already saved by run_batch; only swap the served reference
+                self.store.promote(shadow, version, persist=False)
+                summary["version"] = version
+                logger.info("Promoted NN %s (%d events)", version, summary["n_events"])
+            else:
+                logger.info("Discarded NN update: %s", summary)
+                if summary.get("n_dropped"):
+                    logger.warning(
+                        "%d feedback events of the discarded update written to %s",
+                        summary["n_dropped"], self.batcher.dropped_log.path,
+                    )
+
+            self.offset = new_offset
+            self._save_offset()
+            self.history.append(summary)
+            return summary
+
+    # ------------------------------------------------------------------
+    # Background thread
+    # ------------------------------------------------------------------
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.poll_interval):
+            try:
+                while self.step() is not None and not self._stop.is_set():
+                    pass
+            except Exception:
+                logger.exception("Online NN update failed")
+
+    def start(self) -> "OnlineUpdater":
+        """Start the background update thread and worker process (idempotent)."""
+        if self._thread is None or not self._thread.is_alive():
+            self._stop.clear()
+            if self._executor is None:
+                self._executor = ProcessPoolExecutor(
+                    max_workers=1,
+                    mp_context=multiprocessing.get_context("spawn"),
+                    initializer=_init_worker,
+                    initargs=(self.batcher,),
+                )
+            self._thread = threading.Thread(
+                target=self._run, name="online-nn-updater", daemon=True
+            )
+            self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        """Stop the background update thread and worker process."""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+        if self._executor is not None:
+            self._executor.shutdown()
+            self._executor = None
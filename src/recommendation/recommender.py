@@ -7,7 +7,10 @@ This module provides:
 - Baseline heuristic scoring
 - Combined NN + baseline scoring
 - Simple explanation strings for each recommendation
-- A main recommend_destinations(...) function
+- Optional NN feature attributions for the shortlisted destinations
+- A main recommend_destinations(...) function (a DataFrame wrapper around
+  fast_path.FastRecommender), and the original DataFrame scoring pipeline
+  it is checked against
 """
 
 from __future__ import annotations
@@ -21,6 +24,11 @@ from sklearn.preprocessing import StandardScaler
 from sklearn.neural_network import MLPRegressor
 import joblib
 
+from .explainer import generate_explanation  # re-exported for existing callers
+from .fast_path import FastRecommender, recommendations_to_frame
+from .scoring import baseline_proxy_scores
+from ..utils.config_utils import ScoringPlan
+
 
 # --------------------------------------------------------------------------
 # Paths and loading helpers
@@ -89,53 +97,21 @@ def load_model_and_scaler(
 # --------------------------------------------------------------------------
 
 
-def baseline_proxy_score(user_row: pd.Series, country_row: pd.Series) -> float:
+def baseline_proxy_score(
+    user_row: pd.Series,
+    country_row: pd.Series,
+    scoring_plan: Optional[ScoringPlan] = None,
+) -> float:
     """
     Compute a transparent heuristic suitability score for a (user, country) pair.
     Higher score means a better match.
 
-    This should stay aligned with the README and modeling notebook.
+    The weights are declared in the scoring config (config/scoring_weights.json,
+    compiled by utils.config_utils) and should stay aligned with the README and
+    modeling notebook.
     """
-    score = 0.0
-
-    # Safety
-    safety = country_row.get("safety_index", np.nan)
-    if not pd.isna(safety):
-        score += 0.3 * float(safety)
-
-    # Cost of living (lower is better)
-    cost_index = country_row.get("cost_of_living_index", np.nan)
-    budget = user_row.get("budget_estimated_usd", np.nan)
-    min_budget = country_row.get("min_budget_required", np.nan)
-
-    if not pd.isna(cost_index):
-        score += 0.1 * (-float(cost_index))
-
-    # Budget fit
-    if not pd.isna(budget) and not pd.isna(min_budget):
-        budget_val = float(budget)
-        min_budget_val = float(min_budget)
-        if budget_val >= min_budget_val:
-            score += 0.15
-        else:
-            score -= 0.15
-
-    # Diaspora presence
-    diaspora = country_row.get("diaspora_presence_score", np.nan)
-    if not pd.isna(diaspora):
-        score += 0.2 * float(diaspora)
-
-    # Cultural compatibility
-    cultural = country_row.get("cultural_compatibility_score", np.nan)
-    if not pd.isna(cultural):
-        score += 0.1 * float(cultural)
-
-    # Visa policy
-    visa_score = country_row.get("visa_policy_sudanese_score", np.nan)
-    if not pd.isna(visa_score):
-        score += 0.1 * float(visa_score)
-
-    return float(score)
+    country_frame = pd.DataFrame([country_row])
+    return float(baseline_proxy_scores(user_row, country_frame, scoring_plan)[0])
 
 
 def prepare_features_for_model(
@@ -166,65 +142,81 @@ def prepare_features_for_model(
     return scaler.transform(X_aligned)
 
 
-def generate_explanation(user_row: pd.Series, country_row: pd.Series) -> str:
+def build_model_inputs(
+    user_row: Union[pd.Series, dict],
+    country_df: pd.DataFrame,
+    user_feature_cols: Sequence[str],
+    country_feature_cols: Sequence[str],
+    scaler: StandardScaler,
+    id_col: str = "country_code",
+) -> Tuple[np.ndarray, list]:
+    """
+    Build the scaled (user, country) pair matrix for one user against
+    every row of country_df.
+
+    Returns
+    -------
+    X_scaled : ndarray of shape (len(country_df), n_model_features)
+        Row i is the model input for the pair (user, country_df.iloc[i]).
+    feature_names : list[str]
+        Column names of X_scaled.
+    """
+    if isinstance(user_row, dict):
+        user_row = pd.Series(user_row)
+
+    # Extract numeric user vector for modeling
+    user_num = user_row.reindex(user_feature_cols)
+    user_num_df = pd.DataFrame([user_num])
+
+    # Build country numeric feature block
+    numeric_country_cols = [c for c in country_feature_cols if c != id_col]
+    country_numeric = country_df[numeric_country_cols].copy()
+
+    # Repeat user row for all countries
+    n_countries = len(country_numeric)
+    user_pairs = pd.concat([user_num_df] * n_countries, ignore_index=True)
+
+    X_pairs = pd.concat(
+        [user_pairs, country_numeric.reset_index(drop=True)], axis=1
+    )
+
+    # Handle missing values then align columns with scaler
+    X_pairs_filled = X_pairs.fillna(X_pairs.median(numeric_only=True))
+    X_scaled = prepare_features_for_model(X_pairs_filled, scaler)
+
+    feature_names = list(getattr(scaler, "feature_names_in_", X_pairs_filled.columns))
+    return X_scaled, feature_names
+
+
+def dataframe_pipeline_scores(
+    user_row: Union[pd.Series, dict],
+    country_df: pd.DataFrame,
+    user_feature_cols: Sequence[str],
+    country_feature_cols: Sequence[str],
+    scaler: StandardScaler,
+    nn_model: MLPRegressor,
+    alpha: float = 0.5,
+    id_col: str = "country_code",
+    scoring_plan: Optional[ScoringPlan] = None,
+) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
     """
-    Basic human readable explanation for a recommended destination.
-    Uses a few simple rules based on region, budget, culture, diaspora, safety.
+    Scores of one user against every row of country_df, computed the way
+    recommend_destinations did before FastRecommender (pair DataFrame,
+    scaler.transform, nn_model.predict). Kept as the reference that the
+    fast path is checked against (python -m src.recommendation.fast_path
+    --check).
+
+    Returns
+    -------
+    nn_scores, baseline_scores, final_scores : ndarray of shape (len(country_df),)
     """
-    parts: list[str] = []
-
-    region_group = country_row.get("region_group", "")
-    budget = user_row.get("budget_estimated_usd", None)
-    min_budget = country_row.get("min_budget_required", None)
-
-    # Region preferences flags (optional user features)
-    if region_group == "gulf" and user_row.get("pref_gulf", 0) == 1:
-        parts.append("matches your preference for Gulf countries")
-    if region_group == "east_africa" and user_row.get("pref_east_africa", 0) == 1:
-        parts.append("matches your preference for East Africa")
-    if region_group == "north_africa" and user_row.get("pref_north_africa", 0) == 1:
-        parts.append("matches your preference for North Africa")
-    if region_group == "europe" and user_row.get("pref_europe", 0) == 1:
-        parts.append("matches your preference for Europe")
-
-    # Cultural and language compatibility
-    cult_pref = user_row.get("cultural_preference", "")
-    if (
-        isinstance(cult_pref, str)
-        and "arabic" in cult_pref.lower()
-        and country_row.get("cultural_compatibility_score", 0) > 0.7
-    ):
-        parts.append("has strong Arabic and cultural similarity")
-
-    if user_row.get("lang_english", 0) == 1 and country_row.get(
-        "cultural_compatibility_score", 0
-    ) > 0.3:
-        parts.append("supports English or mixed language environments")
-
-    # Budget
-    if budget is not None and min_budget is not None:
-        try:
-            budget_val = float(budget)
-            min_budget_val = float(min_budget)
-            if budget_val >= min_budget_val:
-                parts.append("fits your stated monthly budget")
-            else:
-                parts.append("may be challenging given your budget")
-        except Exception:
-            pass
-
-    # Diaspora
-    if country_row.get("diaspora_presence_score", 0) >= 0.6:
-        parts.append("has a significant Sudanese community")
-
-    # Safety
-    if country_row.get("safety_index", 0) >= 0.7:
-        parts.append("offers relatively higher safety and stability")
-
-    if not parts:
-        return "Recommended based on overall fit with your preferences and constraints."
-
-    return "Recommended because " + ", ".join(parts) + "."
+    X_scaled, _ = build_model_inputs(
+        user_row, country_df, user_feature_cols, country_feature_cols, scaler, id_col
+    )
+    nn_scores = nn_model.predict(X_scaled)
+    numeric_country_cols = [c for c in country_feature_cols if c != id_col]
+    baseline = baseline_proxy_scores(user_row, country_df[numeric_country_cols], scoring_plan)
+    return nn_scores, baseline, alpha * baseline + (1.0 - alpha) * nn_scores
 
 
 # --------------------------------------------------------------------------
@@ -242,6 +234,10 @@ def recommend_destinations(
     top_k: int = 5,
     alpha: float = 0.5,
     id_col: str = "country_code",
+    feature_attributions: bool = False,
+    attribution_method: str = "gradient_x_input",
+    top_n_features: int = 3,
+    scoring_plan: Optional[ScoringPlan] = None,
 ) -> pd.DataFrame:
     """
     Rank destination countries for a single user.
@@ -269,78 +265,37 @@ def recommend_destinations(
         final_score = alpha * baseline + (1 - alpha) * nn_score.
     id_col : str
         Column to use as destination identifier (code or name).
+    feature_attributions : bool
+        If True, attribute each shortlisted nn_score to its input features
+        (see explainer.nn_feature_attributions) in one batched pass.
+    attribution_method : str
+        "gradient_x_input" or "integrated_gradients".
+    top_n_features : int
+        How many user and country features to report per recommendation.
+    scoring_plan : ScoringPlan, optional
+        Compiled baseline weights (e.g. ScoringConfigWatcher.plan).
+        Defaults to DEFAULT_SCORING_PLAN.
 
     Returns
     -------
     DataFrame
         Top-k recommendations with columns:
-        [country_code, country_name, nn_score, baseline_score, final_score, explanation]
+        [country_code, country_name, nn_score, baseline_score, final_score,
+        explanation, weights_version] plus [top_user_features, top_country_features] when feature_attributions
+        is True, each a list of (feature_name, contribution) tuples.
     """
-    if isinstance(user_features, dict):
-        user_row = pd.Series(user_features)
-    else:
-        user_row = user_features
-
-    # Extract numeric user vector for modeling
-    user_num = user_row.reindex(user_feature_cols)
-    user_num_df = pd.DataFrame([user_num])
-
-    # Build country numeric feature block
-    numeric_country_cols = [c for c in country_feature_cols if c != id_col]
-    country_numeric = country_df[numeric_country_cols].copy()
+    user = user_features if isinstance(user_features, dict) else user_features.to_dict()
 
-    # Repeat user row for all countries
-    n_countries = len(country_numeric)
-    user_pairs = pd.concat([user_num_df] * n_countries, ignore_index=True)
-
-    X_pairs = pd.concat(
-        [user_pairs, country_numeric.reset_index(drop=True)], axis=1
+    fast = FastRecommender(
+        country_df, user_feature_cols, country_feature_cols, scaler, nn_model, id_col
     )
-
-    # Handle missing values then align columns with scaler
-    X_pairs_filled = X_pairs.fillna(X_pairs.median(numeric_only=True))
-    X_scaled = prepare_features_for_model(X_pairs_filled, scaler)
-
-    # Neural network predicted scores
-    nn_scores = nn_model.predict(X_scaled)
-
-    # Baseline heuristic scores
-    baseline_scores = []
-    for i in range(n_countries):
-        c_row = country_numeric.iloc[i]
-        baseline_scores.append(baseline_proxy_score(user_row, c_row))
-
-    baseline_arr = np.array(baseline_scores, dtype=float)
-
-    # Combine scores
-    final_scores = alpha * baseline_arr + (1.0 - alpha) * nn_scores
-
-    # Build result DataFrame
-    country_id = country_df[id_col] if id_col in country_df.columns else country_df.index
-    country_name = (
-        country_df["country_name"]
-        if "country_name" in country_df.columns
-        else country_id
+    records = fast.recommend(
+        user,
+        top_k=top_k,
+        alpha=alpha,
+        scoring_plan=scoring_plan,
+        feature_attributions=feature_attributions,
+        attribution_method=attribution_method,
+        top_n_features=top_n_features,
     )
-
-    result = pd.DataFrame(
-        {
-            "country_code": country_id,
-            "country_name": country_name,
-            "nn_score": nn_scores,
-            "baseline_score": baseline_arr,
-            "final_score": final_scores,
-        }
-    )
-
-    # Generate explanations
-    explanations = []
-    for i in range(len(result)):
-        c_full_row = country_df.iloc[i]
-        explanations.append(generate_explanation(user_row, c_full_row))
-
-    result["explanation"] = explanations
-
-    # Sort and keep top-k
-    result = result.sort_values("final_score", ascending=False).reset_index(drop=True)
-    return result.head(top_k)
+    return recommendations_to_frame(records, feature_attributions)
@@ -0,0 +1,553 @@
+"""
+Two-stage candidate retrieval for large destination catalogs.
+
+recommend_destinations scores every row of country_df. For catalogs of
+thousands of cities / regions (same schema as country_features.csv) this
+module adds a cheap first stage:
+
+1. DestinationIndex builds one KD-tree per region_group over standardized
+   destination features (regions of up to brute_force_size rows get no
+   tree: their linear scores are computed directly, which is exact and
+   cheaper than a tree query at that size).
+2. For a user, the combined score is linearised around each region's
+   median destination (baseline weights + NN input gradient for this
+   user) and each region tree is queried far out along its direction,
+   which returns the destinations with the highest linear score first.
+   The results are re-ranked with the baseline's budget-fit step for
+   the user's budget (and its handling of missing values) added back in.
+   Every region keeps at least top_k candidates, and part of the
+   candidate budget is reserved for regions matching the user's pref_*
+   flags.
+3. Only those candidates are scored exactly (NN + baseline), by slicing
+   a FastRecommender compiled once over the whole catalog.
+
+The index keeps that compiled FastRecommender (rebuilt when the model
+changes), and the per-region gradients are computed from its arrays, so
+a request does not build any DataFrame.
+
+retrieval_recall_at_k compares the two-stage result with exhaustive
+scoring so that n_candidates can be tuned.
+"""
+
+from __future__ import annotations
+
+from typing import Any, Dict, List, Mapping, Optional, Sequence, Tuple, Union
+
+import numpy as np
+import pandas as pd
+from sklearn.neighbors import KDTree
+from sklearn.neural_network import MLPRegressor
+from sklearn.preprocessing import StandardScaler
+
+from .explainer import nn_input_gradients
+from .fast_path import FastRecommender, Recommendation, recommendations_to_frame
+from .recommender import dataframe_pipeline_scores
+from ..utils.config_utils import DEFAULT_SCORING_PLAN, ScoringPlan
+
+
+# Destination features the index is built on
+RETRIEVAL_FEATURES: Tuple[str, ...] = (
+    "safety_index",
+    "cost_of_living_index",
+    "diaspora_presence_score",
+    "visa_policy_sudanese_score",
+    "cultural_compatibility_score",
+    "min_budget_required",
+)
+
+# User preference flag -> region_group values it refers to
+REGION_PREFERENCES: Dict[str, Tuple[str, ...]] = {
+    "pref_gulf": ("gulf",),
+    "pref_east_africa": ("east_africa",),
+    "pref_north_africa": ("north_africa",),
+    "pref_europe": ("europe", "eu_asia"),
+    "pref_uk_ireland": ("europe",),
+    "pref_canada": ("north_america",),
+    "pref_usa": ("north_america",),
+    "pref_asia": ("asia", "eu_asia"),
+}
+
+
+def preferred_regions(user_row: Union[pd.Series, dict]) -> Optional[set]:
+    """
+    Region groups the user expressed a preference for.
+    Returns None when the user has no preference (or prefers anywhere).
+    """
+    if user_row.get("pref_anywhere", 0) == 1:
+        return None
+    regions = set()
+    for flag, groups in REGION_PREFERENCES.items():
+        if user_row.get(flag, 0) == 1:
+            regions.update(groups)
+    return regions or None
+
+
+class DestinationIndex:
+    """
+    Per-region KD-trees over standardized destination feature vectors.
+
+    Parameters
+    ----------
+    country_df : DataFrame
+        Destination catalog with the country_features.csv schema.
+    feature_cols : sequence of str
+        Numeric columns to index (those missing from country_df are skipped).
+    region_col : str
+        Column used to group destinations.
+    leaf_size : int
+        KD-tree leaf size.
+    query_radius : float
+        How far out along the score direction the trees are queried, in
+        multiples of the catalog radius. Larger values make the ranking
+        closer to the linear score at the cost of slower tree pruning.
+    brute_force_size : int
+        Regions with at most this many rows are ranked by their exact
+        linear score instead of a tree query.
+    """
+
+    def __init__(
+        self,
+        country_df: pd.DataFrame,
+        feature_cols: Sequence[str] = RETRIEVAL_FEATURES,
+        region_col: str = "region_group",
+        leaf_size: int = 40,
+        query_radius: float = 10.0,
+        brute_force_size: int = 50_000,
+    ):
+        self.country_df = country_df.reset_index(drop=True)
+        self.feature_cols = [c for c in feature_cols if c in country_df.columns]
+        self.region_col = region_col
+        self.query_radius = query_radius
+
+        # Catalog medians, also used to fill candidate rows when scoring them
+        self.medians_ = self.country_df.median(numeric_only=True)
+
+        values = self.country_df[self.feature_cols].to_numpy(dtype=float)
+        self.missing_ = np.isnan(values)
+        values = np.where(self.missing_, np.nanmedian(values, axis=0), values)
+        self.values_ = values
+
+        self.mean_ = values.mean(axis=0)
+        self.scale_ = values.std(axis=0)
+        self.scale_[self.scale_ == 0] = 1.0
+        self.Z_ = (values - self.mean_) / self.scale_
+        self.radius_ = float(np.sqrt((self.Z_**2).sum(axis=1)).max()) or 1.0
+
+        if region_col in self.country_df.columns:
+            self.regions_ = self.country_df[region_col].fillna("unknown").astype(str).to_numpy()
+        else:
+            self.regions_ = np.full(len(self.country_df), "unknown")
+
+        # Per-region medians (the NN is linearised around them)
+        self.region_medians_ = (
+            self.country_df.groupby(self.regions_).median(numeric_only=True).fillna(self.medians_)
+        )
+
+        # region -> (row positions in country_df, tree over those rows or
+        # None for regions ranked by brute force)
+        self.trees: Dict[str, Tuple[np.ndarray, Optional[KDTree]]] = {}
+        self.centers_: Dict[str, np.ndarray] = {}
+        # Rows with missing index values: baseline_adjustment shifts their
+        # score in a way the trees cannot see, so they are always re-ranked
+        self.incomplete_: Dict[str, np.ndarray] = {}
+        self.incomplete_mask_ = self.missing_.any(axis=1)
+        # Regions without tree: (complete rows, their standardized features)
+        self.brute_force_: Dict[str, Tuple[np.ndarray, np.ndarray]] = {}
+        region_names, self.region_codes_ = np.unique(self.regions_, return_inverse=True)
+        for region in region_names:
+            pos = np.flatnonzero(self.regions_ == region)
+            complete = pos[~self.incomplete_mask_[pos]]
+            if len(pos) > brute_force_size:
+                self.trees[region] = (pos, KDTree(self.Z_[pos], leaf_size=leaf_size))
+            else:
+                self.trees[region] = (pos, None)
+                self.brute_force_[region] = (complete, np.ascontiguousarray(self.Z_[complete]))
+            self.centers_[region] = self.Z_[pos].mean(axis=0)
+            self.incomplete_[region] = pos[self.incomplete_mask_[pos]]
+        self.region_index_ = {region: r for r, region in enumerate(region_names)}
+        self.anchor_z_ = (
+            self.region_medians_.reindex(index=region_names, columns=self.feature_cols)
+            .to_numpy(dtype=float)
+            - self.mean_
+        ) / self.scale_
+
+        # Numeric catalog columns read by baseline_adjustment
+        self._numeric_columns: Dict[str, np.ndarray] = {}
+        # (nn_model, scaler, columns, FastRecommender, scaled anchors, gradient columns)
+        self._compiled: Optional[tuple] = None
+
+    def __len__(self) -> int:
+        return len(self.country_df)
+
+    def _numeric_column(self, col: str) -> np.ndarray:
+        values = self._numeric_columns.get(col)
+        if values is None:
+            values = pd.to_numeric(self.country_df[col], errors="coerce").to_numpy(dtype=float)
+            self._numeric_columns[col] = values
+        return values
+
+    def _compile(
+        self,
+        user_feature_cols: Sequence[str],
+        country_feature_cols: Sequence[str],
+        scaler: StandardScaler,
+        nn_model: MLPRegressor,
+        id_col: str,
+    ) -> tuple:
+        columns = (tuple(user_feature_cols), tuple(country_feature_cols), id_col)
+        compiled = self._compiled
+        if (
+            compiled is None
+            or compiled[0] is not nn_model
+            or compiled[1] is not scaler
+            or compiled[2] != columns
+        ):
+            fast = FastRecommender(
+                self.country_df, user_feature_cols, country_feature_cols,
+                scaler, nn_model, id_col, fill_values=self.medians_,
+            )
+            layout = fast.layout
+            anchors = self.region_medians_.reindex(
+                index=list(self.trees), columns=layout.country_cols
+            ).to_numpy(dtype=float)
+            col_pos = {col: i for i, col in enumerate(layout.feature_names)}
+            grad_cols = np.array([col_pos.get(col, -1) for col in self.feature_cols], dtype=int)
+            compiled = (
+                nn_model, scaler, columns, fast, layout.scale_country(anchors), grad_cols
+            )
+            # One reference assignment, so concurrent requests see either version
+            self._compiled = compiled
+        return compiled
+
+    def recommender(
+        self,
+        user_feature_cols: Sequence[str],
+        country_feature_cols: Sequence[str],
+        scaler: StandardScaler,
+        nn_model: MLPRegressor,
+        id_col: str = "country_code",
+    ) -> FastRecommender:
+        """
+        FastRecommender over the whole catalog (missing values filled with
+        the catalog medians). Compiled on first use and kept until another
+        model, scaler or column list is passed.
+        """
+        return self._compile(
+            user_feature_cols, country_feature_cols, scaler, nn_model, id_col
+        )[3]
+
+    def region_linearisations(
+        self,
+        user_row: Union[pd.Series, dict],
+        user_feature_cols: Sequence[str],
+        country_feature_cols: Sequence[str],
+        scaler: StandardScaler,
+        nn_model: MLPRegressor,
+        alpha: float = 0.5,
+        id_col: str = "country_code",
+        scoring_plan: Optional[ScoringPlan] = None,
+    ) -> Dict[str, Tuple[np.ndarray, float]]:
+        """
+        First-order approximation of final_score (without the budget step,
+        see baseline_adjustment) around each region's median destination.
+
+        Returns
+        -------
+        dict
+            region -> (direction, offset); the approximate score of a
+            destination with standardized index features z is
+            z @ direction + offset, comparable across regions.
+        """
+        directions, offsets = self._linearise(
+            user_row, user_feature_cols, country_feature_cols, scaler, nn_model,
+            alpha, id_col, scoring_plan,
+        )
+        return {
+            region: (directions[r], float(offsets[r])) for r, region in enumerate(self.trees)
+        }
+
+    def _linearise(
+        self,
+        user_row: Union[pd.Series, dict],
+        user_feature_cols: Sequence[str],
+        country_feature_cols: Sequence[str],
+        scaler: StandardScaler,
+        nn_model: MLPRegressor,
+        alpha: float,
+        id_col: str,
+        scoring_plan: Optional[ScoringPlan],
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        """region_linearisations as (n_regions, n_index_features) and (n_regions,) arrays."""
+        # One (user, region median) pair per region: one forward + backward pass
+        # (regions in self.trees order, like anchor_z_)
+        _, _, _, fast, anchors_scaled, grad_cols = self._compile(
+            user_feature_cols, country_feature_cols, scaler, nn_model, id_col
+        )
+        X_scaled = fast.layout.pair_matrix(fast.user_vector(user_row)[None, :], anchors_scaled)
+        preds, grads = nn_input_gradients(nn_model, X_scaled)
+
+        # d nn_score / d standardized index feature
+        raw_grads = grads / fast.layout.scale
+        nn_grad = np.where(grad_cols >= 0, raw_grads[:, grad_cols], 0.0) * self.scale_
+
+        baseline_weights = (scoring_plan or DEFAULT_SCORING_PLAN).linear_weights
+        baseline_dir = np.array([baseline_weights.get(col, 0.0) for col in self.feature_cols])
+        directions = alpha * baseline_dir * self.scale_ + (1.0 - alpha) * nn_grad
+
+        offsets = (1.0 - alpha) * (preds - (nn_grad * self.anchor_z_).sum(axis=1))
+        return directions, offsets
+
+    def baseline_adjustment(
+        self,
+        user_row: Union[pd.Series, dict],
+        positions: np.ndarray,
+        alpha: float = 0.5,
+        scoring_plan: Optional[ScoringPlan] = None,
+    ) -> np.ndarray:
+        """
+        The part of alpha * baseline that the linear direction misses, for
+        the destinations at `positions`: the budget_fit step for the
+        user's budget (0 when the budget or requirement is missing), minus
+        the linear terms of values the baseline drops but the index
+        median-fills.
+        """
+        plan = scoring_plan or DEFAULT_SCORING_PLAN
+        n_lin = len(plan.linear_columns)
+
+        weights = plan.linear_weights
+        w = np.array([weights.get(col, 0.0) for col in self.feature_cols])
+        term = -(self.missing_[positions] * self.values_[positions]) @ w
+        for t, (user_col, country_col, threshold) in enumerate(plan.budget_terms):
+            value = user_row.get(user_col)
+            if value is None or pd.isna(value) or country_col not in self.country_df.columns:
+                continue
+            required = self._numeric_column(country_col)[positions]
+            w_above, w_below = plan.coefficients[n_lin + 2 * t : n_lin + 2 * t + 2]
+            step = np.where(float(value) >= threshold * required, w_above, w_below)
+            term += np.where(np.isnan(required), 0.0, step)
+        return alpha * term
+
+    def candidates(
+        self,
+        user_row: Union[pd.Series, dict],
+        user_feature_cols: Sequence[str],
+        country_feature_cols: Sequence[str],
+        scaler: StandardScaler,
+        nn_model: MLPRegressor,
+        n_candidates: int = 300,
+        alpha: float = 0.5,
+        preferred_share: float = 0.25,
+        id_col: str = "country_code",
+        scoring_plan: Optional[ScoringPlan] = None,
+        min_per_region: int = 5,
+    ) -> np.ndarray:
+        """
+        Row positions (in self.country_df) of the candidate destinations.
+
+        Each region tree returns its best destinations for the user's
+        score direction in that region, ranked by linear score plus
+        baseline_adjustment. A preferred_share of the candidate budget
+        goes to regions matching the user's pref_* flags, the rest to the
+        best destinations overall. The best min_per_region rows of every
+        region are added on top
+        (use the top_k of the final ranking), so a small region is never
+        crowded out; up to n_regions * min_per_region rows more than
+        n_candidates can be returned.
+        """
+        if n_candidates >= len(self):
+            return np.arange(len(self))
+
+        directions, offsets = self._linearise(
+            user_row, user_feature_cols, country_feature_cols, scaler, nn_model,
+            alpha, id_col, scoring_plan,
+        )
+
+        # Best n_candidates complete rows of every region along that
+        # region's direction, plus all of its incomplete rows
+        found, approx = [], []
+        k = max(n_candidates, min_per_region)
+        for r, (region, (pos, tree)) in enumerate(self.trees.items()):
+            direction, offset = directions[r], offsets[r]
+            if tree is None:
+                rows, Z = self.brute_force_[region]
+                scores = Z @ direction
+                if k < len(rows):
+                    top = np.argpartition(-scores, k - 1)[:k]
+                    rows, scores = rows[top], scores[top]
+            else:
+                norm = np.linalg.norm(direction)
+                query_dir = direction if norm > 0 else np.ones_like(direction)
+                norm = norm if norm > 0 else np.sqrt(len(direction))
+                # Query from the region's centre, so the nearest rows are the
+                # highest-scoring ones even for regions far from the catalog mean
+                step = self.query_radius * self.radius_ / norm
+                query = self.centers_[region] + step * query_dir
+                _, idx = tree.query(query[None, :], k=min(k, len(pos)))
+                rows = pos[idx[0]]
+                rows = rows[~self.incomplete_mask_[rows]]
+                scores = self.Z_[rows] @ direction
+            incomplete = self.incomplete_[region]
+            found += [rows, incomplete]
+            approx += [scores + offset, self.Z_[incomplete] @ direction + offset]
+        pool = np.concatenate(found)
+        approx = np.concatenate(approx) + self.baseline_adjustment(
+            user_row, pool, alpha, scoring_plan
+        )
+        pool = pool[np.argsort(-approx, kind="stable")]
+        codes = self.region_codes_[pool]
+
+        # Reserve part of the budget for the user's preferred regions
+        preferred = preferred_regions(user_row)
+        if preferred is None or preferred_share <= 0:
+            selected = np.zeros(len(pool), dtype=bool)
+            selected[:n_candidates] = True
+        else:
+            preferred_codes = [self.region_index_[r] for r in preferred if r in self.region_index_]
+            in_preferred = np.isin(codes, preferred_codes)
+            n_reserved = int(round(preferred_share * n_candidates))
+            selected = in_preferred & (np.cumsum(in_preferred) <= n_reserved)
+            rest = ~selected & (np.cumsum(~selected) <= n_candidates - selected.sum())
+            selected |= rest
+
+        # Every region keeps its best min_per_region rows on top of the cut
+        by_region = np.argsort(codes, kind="stable")
+        sorted_codes = codes[by_region]
+        region_start = np.searchsorted(sorted_codes, sorted_codes)
+        rank_in_region = np.arange(len(pool)) - region_start
+        selected[by_region[rank_in_region < min_per_region]] = True
+        return pool[selected]
+
+    def recommend(
+        self,
+        user: Mapping[str, Any],
+        user_feature_cols: Sequence[str],
+        country_feature_cols: Sequence[str],
+        scaler: StandardScaler,
+        nn_model: MLPRegressor,
+        top_k: int = 5,
+        alpha: float = 0.5,
+        n_candidates: int = 300,
+        id_col: str = "country_code",
+        **kwargs,
+    ) -> List[Recommendation]:
+        """
+        Two-stage top-k as Recommendation records: candidates() ranked
+        exactly by slicing the compiled FastRecommender. Extra keyword
+        arguments (scoring_plan, feature_attributions, ...) are forwarded
+        to FastRecommender.recommend.
+        """
+        cand = self.candidates(
+            user,
+            user_feature_cols,
+            country_feature_cols,
+            scaler,
+            nn_model,
+            n_candidates=n_candidates,
+            alpha=alpha,
+            id_col=id_col,
+            scoring_plan=kwargs.get("scoring_plan"),
+            min_per_region=top_k,
+        )
+        fast = self.recommender(user_feature_cols, country_feature_cols, scaler, nn_model, id_col)
+        return fast.recommend(user, top_k=top_k, alpha=alpha, rows=cand, **kwargs)
+
+
+def recommend_destinations_two_stage(
+    user_features: Union[pd.Series, dict],
+    index: DestinationIndex,
+    user_feature_cols: Sequence[str],
+    country_feature_cols: Sequence[str],
+    scaler: StandardScaler,
+    nn_model: MLPRegressor,
+    top_k: int = 5,
+    alpha: float = 0.5,
+    n_candidates: int = 300,
+    id_col: str = "country_code",
+    **kwargs,
+) -> pd.DataFrame:
+    """
+    Retrieve candidates from the index, then rank them exactly
+    (DestinationIndex.recommend). Returns the recommend_destinations
+    format; extra keyword arguments (scoring_plan, feature_attributions,
+    ...) are forwarded to FastRecommender.recommend.
+
+    Missing destination values are filled with the medians of the whole
+    catalog, so the exact scores equal exhaustive_final_scores.
+    """
+    user = user_features if isinstance(user_features, dict) else user_features.to_dict()
+    records = index.recommend(
+        user, user_feature_cols, country_feature_cols, scaler, nn_model,
+        top_k=top_k, alpha=alpha, n_candidates=n_candidates, id_col=id_col, **kwargs,
+    )
+    return recommendations_to_frame(records, kwargs.get("feature_attributions", False))
+
+
+def exhaustive_final_scores(
+    user_row: Union[pd.Series, dict],
+    country_df: pd.DataFrame,
+    user_feature_cols: Sequence[str],
+    country_feature_cols: Sequence[str],
+    scaler: StandardScaler,
+    nn_model: MLPRegressor,
+    alpha: float = 0.5,
+    id_col: str = "country_code",
+    scoring_plan: Optional[ScoringPlan] = None,
+) -> np.ndarray:
+    """final_score of one user against every row of country_df (no explanations)."""
+    return dataframe_pipeline_scores(
+        user_row, country_df, user_feature_cols, country_feature_cols,
+        scaler, nn_model, alpha, id_col, scoring_plan,
+    )[2]
+
+
+def retrieval_recall_at_k(
+    user_df: pd.DataFrame,
+    index: DestinationIndex,
+    user_feature_cols: Sequence[str],
+    country_feature_cols: Sequence[str],
+    scaler: StandardScaler,
+    nn_model: MLPRegressor,
+    k: int = 5,
+    candidate_counts: Sequence[int] = (50, 100, 200, 300, 500),
+    alpha: float = 0.5,
+    id_col: str = "country_code",
+    scoring_plan: Optional[ScoringPlan] = None,
+) -> pd.DataFrame:
+    """
+    Recall@k of the two-stage ranking against exhaustive scoring.
+
+    For each user, the exhaustive top-k is computed once; for each
+    candidate count, recall is the share of that top-k that made it into
+    the candidate set (candidates are then ranked exactly, so those
+    destinations also make the two-stage top-k).
+
+    Returns
+    -------
+    DataFrame
+        One row per candidate count with columns
+        [n_candidates, recall_at_k, min_recall_at_k].
+    """
+    recalls: Dict[int, List[float]] = {n: [] for n in candidate_counts}
+
+    for _, user_row in user_df.iterrows():
+        scores = exhaustive_final_scores(
+            user_row, index.country_df, user_feature_cols, country_feature_cols,
+            scaler, nn_model, alpha, id_col, scoring_plan,
+        )
+        true_top = set(np.argsort(-scores, kind="stable")[:k])
+
+        for n in candidate_counts:
+            cand = index.candidates(
+                user_row, user_feature_cols, country_feature_cols, scaler, nn_model,
+                n_candidates=n, alpha=alpha, id_col=id_col, scoring_plan=scoring_plan,
+                min_per_region=k,
+            )
+            recalls[n].append(len(true_top.intersection(cand)) / len(true_top))
+
+    return pd.DataFrame(
+        {
+            "n_candidates": list(candidate_counts),
+            "recall_at_k": [float(np.mean(recalls[n])) for n in candidate_counts],
+            "min_recall_at_k": [float(np.min(recalls[n])) for n in candidate_counts],
+        }
+    )
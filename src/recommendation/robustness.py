@@ -0,0 +1,223 @@
+"""
+Monte Carlo rank stability for uncertain country indicators.
+
+Values in country_features.csv such as safety_index,
+visa_policy_sudanese_score or diaspora_presence_score are rough estimates
+(see docs/country_features.md). Instead of a single ranking, this module
+samples N perturbed catalogs from per-column noise specs and reports, per
+destination, how often it lands in the top-k and the spread of its rank.
+
+All samples are scored in one batched (samples x destinations) pass:
+- the user's contribution to the first NN layer and the unperturbed
+  destination part are taken from a compiled FastRecommender and reused
+- each sample only adds (noise @ first-layer weights) for the perturbed
+  columns, then the rest of the network runs on all samples at once
+- baseline scores are updated with the same noise, term by term
+"""
+
+from __future__ import annotations
+
+from typing import Any, Dict, Mapping, Optional, Sequence, Union
+
+import numpy as np
+import pandas as pd
+from sklearn.neural_network import MLPRegressor
+from sklearn.preprocessing import StandardScaler
+
+from .fast_path import FastRecommender
+from ..models.nn_model import mlp_forward_from_first_layer
+from ..utils.config_utils import DEFAULT_SCORING_PLAN, ScoringPlan
+
+
+# Gaussian noise per column: absolute "sd" and / or "rel_sd" (fraction of
+# the value), optionally clipped to a [low, high] range (None = unbounded).
+DEFAULT_NOISE_SPECS: Dict[str, Dict[str, Any]] = {
+    "safety_index": {"sd": 0.10, "clip": (0.0, 1.0)},
+    "visa_policy_sudanese_score": {"sd": 0.15, "clip": (0.0, 1.0)},
+    "diaspora_presence_score": {"sd": 0.15, "clip": (0.0, 1.0)},
+    "cultural_compatibility_score": {"sd": 0.10, "clip": (0.0, 1.0)},
+    "cost_of_living_index": {"rel_sd": 0.10, "clip": (0.0, None)},
+    "min_budget_required": {"rel_sd": 0.15, "clip": (0.0, None)},
+}
+
+# Maximum number of (sample, destination) rows per NN batch
+MAX_ROWS_PER_BATCH = 200_000
+
+
+def sample_column_noise(
+    values: np.ndarray,
+    spec: Mapping[str, Any],
+    n_samples: int,
+    rng: np.random.Generator,
+) -> np.ndarray:
+    """
+    Additive noise (perturbed - nominal) for one catalog column.
+
+    Parameters
+    ----------
+    values : ndarray (n_countries,)
+        Nominal column values (no NaN).
+    spec : mapping
+        Noise spec with optional keys "sd", "rel_sd" and "clip".
+    n_samples : int
+    rng : numpy Generator
+
+    Returns
+    -------
+    ndarray of shape (n_samples, n_countries)
+    """
+    sd = float(spec.get("sd", 0.0)) + float(spec.get("rel_sd", 0.0)) * np.abs(values)
+    perturbed = values + rng.standard_normal((n_samples, len(values))) * sd
+    low, high = spec.get("clip", (None, None))
+    if low is not None or high is not None:
+        perturbed = np.clip(perturbed, low, high)
+    return perturbed - values
+
+
+def rank_stability(
+    fast: FastRecommender,
+    user: Mapping[str, Any],
+    noise_specs: Optional[Mapping[str, Mapping[str, Any]]] = None,
+    n_samples: int = 1000,
+    top_k: int = 5,
+    alpha: float = 0.5,
+    scoring_plan: Optional[ScoringPlan] = None,
+    percentiles: Sequence[float] = (5, 50, 95),
+    random_state: Optional[Union[int, np.random.Generator]] = None,
+) -> pd.DataFrame:
+    """
+    Rank distribution of every destination under catalog uncertainty.
+
+    Parameters
+    ----------
+    fast : FastRecommender
+        Compiled catalog, scaler and model.
+    user : dict-like
+        User features, e.g. the output of build_user_from_form.
+    noise_specs : mapping, optional
+        Column -> noise spec (see DEFAULT_NOISE_SPECS). Columns that are
+        neither model nor baseline inputs are ignored.
+    n_samples : int
+        Number of perturbed catalogs.
+    top_k, alpha, scoring_plan
+        As in recommend_destinations.
+    percentiles : sequence of float
+        Rank percentiles to report.
+    random_state : int or Generator, optional
+
+    Returns
+    -------
+    DataFrame
+        One row per destination, sorted by p_top_k, with columns
+        [country_code, country_name, nominal_rank, p_top_k, mean_final_score,
+        rank_p<q> for each q in percentiles]. Ranks are 1-based.
+    """
+    plan = scoring_plan or DEFAULT_SCORING_PLAN
+    noise_specs = DEFAULT_NOISE_SPECS if noise_specs is None else noise_specs
+    rng = np.random.default_rng(random_state)
+    layout = fast.layout
+    baseline_df = fast.baseline_country_df
+    n_countries = fast.n_countries
+
+    # Noise per column, shared by the NN and the baseline
+    noise: Dict[str, np.ndarray] = {}
+    for col, spec in noise_specs.items():
+        if col in layout.country_cols:
+            nominal = fast.country_values[:, layout.country_cols.index(col)]
+        elif col in baseline_df.columns:
+            nominal = pd.to_numeric(baseline_df[col], errors="coerce").to_numpy(dtype=float)
+            nominal = np.where(np.isnan(nominal), 0.0, nominal)
+        else:
+            continue
+        noise[col] = sample_column_noise(nominal, spec, n_samples, rng)
+
+    # NN: nominal first layer (destinations + this user) computed once,
+    # each sample adds its scaled noise through the first-layer weights
+    first_nominal = fast.first_layer_country + fast.user_vector(user) @ fast.W1_user
+    nn_cols = [c for c in noise if c in layout.country_cols]
+    nn_idx = [layout.country_cols.index(c) for c in nn_cols]
+    W_noise = fast.W1_country[nn_idx]
+    col_scale = layout.scale[layout.country_idx][nn_idx]
+
+    nn = np.empty((n_samples, n_countries))
+    chunk = max(1, MAX_ROWS_PER_BATCH // max(n_countries, 1))
+    for start in range(0, n_samples, chunk):
+        stop = min(start + chunk, n_samples)
+        first = np.broadcast_to(first_nominal, (stop - start,) + first_nominal.shape).copy()
+        if nn_cols:
+            scaled_noise = np.stack([noise[c][start:stop] for c in nn_cols], axis=-1) / col_scale
+            first += scaled_noise @ W_noise
+        nn[start:stop] = mlp_forward_from_first_layer(
+            fast.nn_model, first.reshape(-1, first.shape[-1])
+        ).reshape(stop - start, n_countries)
+
+    # Baseline: nominal scores plus the change of every perturbed term
+    baseline = np.tile(fast.baseline_scores(user, plan), (n_samples, 1))
+    for col, weight in plan.linear_weights.items():
+        if col in noise and col in baseline_df.columns:
+            raw = pd.to_numeric(baseline_df[col], errors="coerce").to_numpy(dtype=float)
+            baseline += np.where(np.isnan(raw), 0.0, weight * noise[col])
+
+    _, budget_terms = fast.baseline_parts(plan)
+    for (user_col, country_col, threshold), (_, required, missing, w_above, w_below) in zip(
+        plan.budget_terms, budget_terms
+    ):
+        value = user.get(user_col, np.nan)
+        if country_col not in noise or value is None or pd.isna(value):
+            continue
+        value = float(value)
+        nominal_term = np.where(value >= required, w_above, w_below)
+        sampled_term = np.where(
+            value >= required + threshold * noise[country_col], w_above, w_below
+        )
+        baseline += np.where(missing, 0.0, sampled_term - nominal_term)
+
+    final = alpha * baseline + (1.0 - alpha) * nn
+
+    # 1-based rank of every destination in every sample
+    order = np.argsort(-final, axis=1, kind="stable")
+    ranks = np.empty_like(order)
+    np.put_along_axis(ranks, order, np.arange(1, n_countries + 1)[None, :], axis=1)
+
+    nominal_final = alpha * fast.baseline_scores(user, plan) + (1.0 - alpha) * fast.nn_scores(user)
+    nominal_rank = np.empty(n_countries, dtype=int)
+    nominal_rank[np.argsort(-nominal_final, kind="stable")] = np.arange(1, n_countries + 1)
+
+    result = pd.DataFrame(
+        {
+            "country_code": fast.country_ids,
+            "country_name": fast.country_names,
+            "nominal_rank": nominal_rank,
+            "p_top_k": (ranks <= top_k).mean(axis=0),
+            "mean_final_score": final.mean(axis=0),
+        }
+    )
+    for q, values in zip(percentiles, np.percentile(ranks, percentiles, axis=0)):
+        result[f"rank_p{q:g}"] = values
+
+    return result.sort_values(
+        ["p_top_k", "nominal_rank"], ascending=[False, True]
+    ).reset_index(drop=True)
+
+
+def recommend_destinations_robust(
+    user_features: Union[pd.Series, dict],
+    country_df: pd.DataFrame,
+    user_feature_cols: Sequence[str],
+    country_feature_cols: Sequence[str],
+    scaler: StandardScaler,
+    nn_model: MLPRegressor,
+    top_k: int = 5,
+    alpha: float = 0.5,
+    id_col: str = "country_code",
+    **kwargs,
+) -> pd.DataFrame:
+    """
+    DataFrame-level entry point with the recommend_destinations signature.
+    Extra keyword arguments are forwarded to rank_stability.
+    """
+    user = user_features if isinstance(user_features, dict) else user_features.to_dict()
+    fast = FastRecommender(
+        country_df, user_feature_cols, country_feature_cols, scaler, nn_model, id_col
+    )
+    return rank_stability(fast, user, top_k=top_k, alpha=alpha, **kwargs)
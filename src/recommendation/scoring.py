@@ -0,0 +1,162 @@
+"""
+Vectorized scoring helpers for the Sudanese relocation recommender.
+
+Scores a whole destination catalog for one or many users with array
+operations instead of one baseline_proxy_score(...) call per country, and
+builds NN input matrices for (user, destination) pairs with NumPy
+broadcasting (PairFeatureLayout). The baseline weights come from a
+compiled ScoringPlan (see utils.config_utils); the default plan reproduces
+the weights documented in the README and the modeling notebook.
+"""
+
+from __future__ import annotations
+
+from typing import List, Optional, Sequence, Union
+
+import numpy as np
+import pandas as pd
+from sklearn.preprocessing import StandardScaler
+
+from ..utils.config_utils import DEFAULT_SCORING_PLAN, ScoringPlan
+
+
+def baseline_proxy_scores(
+    user_row: Union[pd.Series, dict],
+    country_df: pd.DataFrame,
+    scoring_plan: Optional[ScoringPlan] = None,
+) -> np.ndarray:
+    """
+    Baseline heuristic score of one user against every destination.
+
+    Missing values (or missing columns) simply drop the corresponding term.
+
+    Parameters
+    ----------
+    user_row : Series or dict
+        User features (only the columns referenced by the plan are used).
+    country_df : DataFrame
+        Destination features, one row per destination.
+    scoring_plan : ScoringPlan, optional
+        Compiled scoring config. Defaults to DEFAULT_SCORING_PLAN.
+
+    Returns
+    -------
+    ndarray of shape (len(country_df),)
+    """
+    plan = scoring_plan or DEFAULT_SCORING_PLAN
+    return plan.score(user_row, country_df)
+
+
+def baseline_score_matrix(
+    user_df: pd.DataFrame,
+    country_df: pd.DataFrame,
+    scoring_plan: Optional[ScoringPlan] = None,
+) -> np.ndarray:
+    """
+    Baseline heuristic scores of many users against every destination.
+
+    Returns
+    -------
+    ndarray of shape (len(user_df), len(country_df))
+    """
+    plan = scoring_plan or DEFAULT_SCORING_PLAN
+    return plan.score_matrix(user_df, country_df)
+
+
+class PairFeatureLayout:
+    """
+    Column layout of the NN input for (user, destination) pairs.
+
+    Splits the scaler's training columns into those coming from the user
+    and those coming from the destination, and scales them with the
+    scaler's mean_ / scale_ directly, so pair matrices can be built with
+    NumPy broadcasting instead of one DataFrame per user.
+
+    Model columns that are neither user nor destination features are
+    filled with 0 before scaling, like prepare_features_for_model does.
+
+    Parameters
+    ----------
+    scaler : StandardScaler
+        Fitted scaler from training.
+    user_feature_cols, country_feature_cols : sequence of str
+        Same column lists as passed to recommend_destinations.
+    id_col : str
+        Destination identifier column (excluded from numeric features).
+    """
+
+    def __init__(
+        self,
+        scaler: StandardScaler,
+        user_feature_cols: Sequence[str],
+        country_feature_cols: Sequence[str],
+        id_col: str = "country_code",
+    ):
+        user_set = set(user_feature_cols)
+        numeric_country_cols = [c for c in country_feature_cols if c != id_col]
+        country_set = set(numeric_country_cols) - user_set
+
+        train_cols = getattr(scaler, "feature_names_in_", None)
+        if train_cols is None:
+            train_cols = list(user_feature_cols) + numeric_country_cols
+        self.feature_names: List[str] = list(train_cols)
+
+        self.user_idx = np.array(
+            [i for i, c in enumerate(self.feature_names) if c in user_set], dtype=int
+        )
+        self.country_idx = np.array(
+            [i for i, c in enumerate(self.feature_names) if c in country_set], dtype=int
+        )
+        self.user_cols = [self.feature_names[i] for i in self.user_idx]
+        self.country_cols = [self.feature_names[i] for i in self.country_idx]
+
+        n_features = len(self.feature_names)
+        mean = getattr(scaler, "mean_", None)
+        scale = getattr(scaler, "scale_", None)
+        self.mean = np.zeros(n_features) if mean is None else np.asarray(mean, dtype=float)
+        self.scale = np.ones(n_features) if scale is None else np.asarray(scale, dtype=float)
+
+        # Scaled value of the zero-filled columns
+        self.fill_scaled = (0.0 - self.mean) / self.scale
+
+    @property
+    def n_features(self) -> int:
+        return len(self.feature_names)
+
+    def scale_user(self, user_values: np.ndarray) -> np.ndarray:
+        """Scale raw user values (n_users, len(user_cols))."""
+        return (user_values - self.mean[self.user_idx]) / self.scale[self.user_idx]
+
+    def scale_country(self, country_values: np.ndarray) -> np.ndarray:
+        """Scale raw destination values (n_countries, len(country_cols))."""
+        return (country_values - self.mean[self.country_idx]) / self.scale[self.country_idx]
+
+    def pair_matrix(
+        self,
+        user_scaled: np.ndarray,
+        country_scaled: np.ndarray,
+        out: Optional[np.ndarray] = None,
+    ) -> np.ndarray:
+        """
+        Scaled model inputs for every (user, destination) pair.
+
+        Parameters
+        ----------
+        user_scaled : ndarray (n_users, len(user_cols))
+        country_scaled : ndarray (n_countries, len(country_cols))
+        out : ndarray (n_users * n_countries, n_features), optional
+            Preallocated buffer to write into.
+
+        Returns
+        -------
+        ndarray of shape (n_users * n_countries, n_features)
+            Rows ordered user-major: row u * n_countries + c is (u, c).
+        """
+        n_users, n_countries = len(user_scaled), len(country_scaled)
+        if out is None:
+            out = np.empty((n_users * n_countries, self.n_features))
+        X = out.reshape(n_users, n_countries, self.n_features)
+        X[:] = self.fill_scaled
+        X[:, :, self.user_idx] = user_scaled[:, None, :]
+        X[:, :, self.country_idx] = country_scaled[None, :, :]
+        return out
@@ -0,0 +1,339 @@
+"""
+Scoring configuration for the baseline heuristic.
+
+This module provides:
+- Loading of a declarative scoring config (JSON) listing terms, weights
+  and thresholds (see config/scoring_weights.json). DEFAULT_SCORING_PLAN,
+  used by every function called without a scoring_plan, is compiled
+  from that file at import time
+- Compilation of that config into a ScoringPlan: a term matrix builder
+  plus a coefficient vector, so scoring a catalog is one matrix-vector
+  product
+- A ScoringConfigWatcher that polls the config file and atomically swaps
+  in the newly compiled plan, so a running service picks up new weights
+  without a restart
+
+Supported term types:
+- "linear":     weight * country[column]   (term dropped when missing)
+- "budget_fit": weight_above if user[user_column] >= threshold * country[column]
+                else weight_below            (term dropped when either is missing)
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import logging
+import threading
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Dict, Optional, Tuple, Union
+
+import numpy as np
+import pandas as pd
+
+from ..config import SCORING_CONFIG
+
+
+logger = logging.getLogger(__name__)
+
+
+# Fallback when config/scoring_weights.json is missing (same weights as the
+# original hardcoded baseline_proxy_score). The file is the source of truth.
+DEFAULT_SCORING_CONFIG: Dict[str, Any] = {
+    "version": "baseline-v1",
+    "terms": [
+        {"name": "safety", "type": "linear", "column": "safety_index", "weight": 0.3},
+        {"name": "cost_of_living", "type": "linear", "column": "cost_of_living_index", "weight": -0.1},
+        {
+            "name": "budget_fit",
+            "type": "budget_fit",
+            "user_column": "budget_estimated_usd",
+            "column": "min_budget_required",
+            "threshold": 1.0,
+            "weight_above": 0.15,
+            "weight_below": -0.15,
+        },
+        {"name": "diaspora", "type": "linear", "column": "diaspora_presence_score", "weight": 0.2},
+        {"name": "cultural", "type": "linear", "column": "cultural_compatibility_score", "weight": 0.1},
+        {"name": "visa", "type": "linear", "column": "visa_policy_sudanese_score", "weight": 0.1},
+    ],
+}
+
+
+# --------------------------------------------------------------------------
+# Loading and compilation
+# --------------------------------------------------------------------------
+
+
+@dataclass(frozen=True)
+class ScoringPlan:
+    """
+    Compiled scoring config.
+
+    Attributes
+    ----------
+    version : str
+        Declared config version plus a short hash of its content, recorded
+        with every response scored by this plan.
+    linear_columns : tuple[str, ...]
+        Country columns of the linear terms, in coefficient order.
+    budget_terms : tuple of (user_column, country_column, threshold)
+        One entry per budget_fit term. Each contributes two columns to the
+        term matrix (fit / no fit indicators).
+    coefficients : ndarray
+        Weights for [linear terms..., (above, below) per budget term].
+    """
+
+    version: str
+    linear_columns: Tuple[str, ...]
+    budget_terms: Tuple[Tuple[str, str, float], ...]
+    coefficients: np.ndarray
+
+    @property
+    def linear_weights(self) -> Dict[str, float]:
+        """Country column -> weight of the linear terms."""
+        weights: Dict[str, float] = {}
+        for col, w in zip(self.linear_columns, self.coefficients):
+            weights[col] = weights.get(col, 0.0) + float(w)
+        return weights
+
+    def term_matrix(
+        self, user_row: Union[pd.Series, dict], country_df: pd.DataFrame
+    ) -> np.ndarray:
+        """
+        Term values of one user against every destination, shape
+        (len(country_df), len(coefficients)). Missing values give 0.
+        """
+        n = len(country_df)
+        columns = [_numeric_column(country_df, col) for col in self.linear_columns]
+
+        for user_col, country_col, threshold in self.budget_terms:
+            value = user_row.get(user_col, np.nan)
+            required = _numeric_column(country_df, country_col)
+            if pd.isna(value):
+                fits = np.full(n, np.nan)
+            else:
+                fits = np.where(
+                    np.isnan(required), np.nan, (float(value) >= threshold * required)
+                )
+            columns.append(fits == 1)
+            columns.append(fits == 0)
+
+        if not columns:
+            return np.zeros((n, 0))
+        M = np.column_stack(columns).astype(float)
+        return np.where(np.isnan(M), 0.0, M)
+
+    def score(self, user_row: Union[pd.Series, dict], country_df: pd.DataFrame) -> np.ndarray:
+        """Baseline score of one user against every destination."""
+        return self.term_matrix(user_row, country_df) @ self.coefficients
+
+    def score_matrix(self, user_df: pd.DataFrame, country_df: pd.DataFrame) -> np.ndarray:
+        """
+        Baseline scores of many users against every destination, shape
+        (len(user_df), len(country_df)).
+
+        The linear terms only depend on the destination and are computed
+        once; budget terms are broadcast over (users x destinations).
+        """
+        n_lin = len(self.linear_columns)
+        lin = np.column_stack(
+            [_numeric_column(country_df, col) for col in self.linear_columns]
+        ) if n_lin else np.zeros((len(country_df), 0))
+        lin = np.where(np.isnan(lin), 0.0, lin) @ self.coefficients[:n_lin]
+
+        scores = np.tile(lin, (len(user_df), 1))
+        for t, (user_col, country_col, threshold) in enumerate(self.budget_terms):
+            value = _numeric_column(user_df, user_col)[:, None]
+            required = threshold * _numeric_column(country_df, country_col)[None, :]
+            w_above, w_below = self.coefficients[n_lin + 2 * t : n_lin + 2 * t + 2]
+            term = np.where(value >= required, w_above, w_below)
+            scores += np.where(np.isnan(value) | np.isnan(required), 0.0, term)
+
+        return scores
+
+
+def _numeric_column(df: pd.DataFrame, col: str) -> np.ndarray:
+    if col in df.columns:
+        return pd.to_numeric(df[col], errors="coerce").to_numpy(dtype=float)
+    return np.full(len(df), np.nan)
+
+
+def _config_digest(config: Dict[str, Any]) -> str:
+    payload = json.dumps(config.get("terms", []), sort_keys=True).encode("utf-8")
+    return hashlib.sha1(payload).hexdigest()[:8]
+
+
+def compile_scoring_config(config: Dict[str, Any]) -> ScoringPlan:
+    """
+    Validate a scoring config dict and compile it into a ScoringPlan.
+
+    Raises
+    ------
+    ValueError
+        If a term is malformed or has an unknown type.
+    """
+    terms = config.get("terms")
+    if not isinstance(terms, list) or not terms:
+        raise ValueError("Scoring config must declare a non-empty 'terms' list")
+
+    linear_columns = []
+    linear_weights = []
+    budget_terms = []
+    budget_weights = []
+
+    for term in terms:
+        term_type = term.get("type", "linear")
+        name = term.get("name", term.get("column", "?"))
+        try:
+            if term_type == "linear":
+                linear_columns.append(str(term["column"]))
+                linear_weights.append(float(term["weight"]))
+            elif term_type == "budget_fit":
+                budget_terms.append(
+                    (
+                        str(term.get("user_column", "budget_estimated_usd")),
+                        str(term.get("column", "min_budget_required")),
+                        float(term.get("threshold", 1.0)),
+                    )
+                )
+                budget_weights.extend(
+                    [float(term["weight_above"]), float(term["weight_below"])]
+                )
+            else:
+                raise ValueError(f"unknown term type '{term_type}'")
+        except (KeyError, TypeError, ValueError) as exc:
+            raise ValueError(f"Invalid scoring term '{name}': {exc}") from exc
+
+    version = f"{config.get('version', 'unversioned')}@{_config_digest(config)}"
+
+    return ScoringPlan(
+        version=version,
+        linear_columns=tuple(linear_columns),
+        budget_terms=tuple(budget_terms),
+        coefficients=np.array(linear_weights + budget_weights, dtype=float),
+    )
+
+
+def load_scoring_config(path: Union[str, Path]) -> ScoringPlan:
+    """
+    Load and compile a scoring config file.
+
+    Parameters
+    ----------
+    path : str or Path
+        Path to a JSON scoring config (see config/scoring_weights.json).
+
+    Returns
+    -------
+    ScoringPlan
+    """
+    path = Path(path)
+    if not path.exists():
+        raise FileNotFoundError(f"Scoring config not found at {path}")
+    with path.open("r", encoding="utf-8") as f:
+        config = json.load(f)
+    return compile_scoring_config(config)
+
+
+def load_default_scoring_plan(path: Union[str, Path] = SCORING_CONFIG) -> ScoringPlan:
+    """
+    Plan used when no scoring_plan is passed: the project's scoring config
+    file, or DEFAULT_SCORING_CONFIG if that file is missing.
+    """
+    try:
+        return load_scoring_config(path)
+    except FileNotFoundError:
+        logger.warning("Scoring config %s not found, using built-in weights", path)
+        return compile_scoring_config(DEFAULT_SCORING_CONFIG)
+
+
+DEFAULT_SCORING_PLAN = load_default_scoring_plan()
+
+
+# --------------------------------------------------------------------------
+# Hot reload
+# --------------------------------------------------------------------------
+
+
+class ScoringConfigWatcher:
+    """
+    Keep a compiled ScoringPlan in sync with a config file.
+
+    A background thread polls the file's modification time; when it
+    changes, the file is recompiled and the new plan replaces the old one
+    in a single reference assignment. Callers should read `plan` once per
+    request and use that object throughout, so in-flight requests finish
+    with the weights they started with. If the new file fails to load, the
+    previous plan stays active.
+
+    Parameters
+    ----------
+    path : str or Path
+        Scoring config file to watch.
+    poll_interval : float
+        Seconds between modification-time checks.
+    """
+
+    def __init__(self, path: Union[str, Path], poll_interval: float = 2.0):
+        self.path = Path(path)
+        self.poll_interval = poll_interval
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._mtime = self._current_mtime()
+        self._plan = load_scoring_config(self.path)
+
+    @property
+    def plan(self) -> ScoringPlan:
+        """Currently active plan."""
+        return self._plan
+
+    def _current_mtime(self) -> Optional[int]:
+        try:
+            stat = self.path.stat()
+        except FileNotFoundError:
+            return None
+        return stat.st_mtime_ns
+
+    def reload_if_changed(self) -> bool:
+        """
+        Recompile the config if the file changed since the last load.
+        Returns True when a new plan was swapped in.
+        """
+        with self._lock:
+            mtime = self._current_mtime()
+            if mtime is None or mtime == self._mtime:
+                return False
+            try:
+                new_plan = load_scoring_config(self.path)
+            except (OSError, ValueError) as exc:
+                logger.warning("Keeping scoring plan %s: %s", self._plan.version, exc)
+                self._mtime = mtime
+                return False
+            self._mtime = mtime
+            self._plan = new_plan
+            logger.info("Loaded scoring plan %s from %s", new_plan.version, self.path)
+            return True
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.poll_interval):
+            self.reload_if_changed()
+
+    def start(self) -> "ScoringConfigWatcher":
+        """Start the background polling thread (idempotent)."""
+        if self._thread is None or not self._thread.is_alive():
+            self._stop.clear()
+            self._thread = threading.Thread(
+                target=self._run, name="scoring-config-watcher", daemon=True
+            )
+            self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        """Stop the background polling thread."""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None